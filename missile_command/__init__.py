@@ -0,0 +1,9 @@
+# Missile Command, started with python -m missile_command
+# Importing the package doesn't run anything, pygame is only imported once something draws or uses a rect,
+# and only initialised once the game window is opened
+
+from missile_command.game import (Bresenham, City, Engine, Explosion, Missile, Recorder, Renderer, Silo, bind,
+                                  constrain, load_recording, main, replay, within)
+
+__all__ = ["Bresenham", "City", "Engine", "Explosion", "Missile", "Recorder", "Renderer", "Silo", "bind", "constrain",
+           "load_recording", "main", "replay", "within"]
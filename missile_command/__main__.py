@@ -0,0 +1,5 @@
+# Entry point when the package is run with python -m missile_command
+from missile_command.game import main
+
+if __name__ == "__main__":
+    main()
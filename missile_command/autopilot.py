@@ -0,0 +1,157 @@
+# Defender which fires at incoming attack missiles, aiming where each shot will meet its missile
+# Every tick, the intercept point of every attack missile from every silo is solved at once with NumPy,
+# using the Bresenham path each missile follows to its end point, so hundreds of missiles cost a handful
+# of array operations. Shots are then picked by how many buildings each missile threatens,
+# from the silo the engine will actually launch from, while there is ammunition left. Used for soak tests:
+#   python -m missile_command --autopilot
+#   python -m missile_command.batch --defender autopilot
+
+# Imports
+import math
+
+from missile_command import game
+
+# NumPy is loaded by the first plan, as the game only imports it when needed
+numpy = None
+
+
+# Bresenham paths of many missiles at once, for finding the point any amount of steps along each of them
+# Points come from game.path_offsets, so they are exactly where the missiles will be
+class Paths:
+
+    # Initialize the paths between arrays of start and end points, rounded to whole pixels like Bresenham
+    def __init__(self, start_x, start_y, end_x, end_y):
+        start_x, start_y, end_x, end_y = (numpy.floor(value + 0.5) for value in (start_x, start_y, end_x, end_y))
+        self.start_x = start_x
+        self.start_y = start_y
+        self.dx = numpy.abs(end_x - start_x)
+        self.dy = numpy.abs(end_y - start_y)
+        self.sx = numpy.where(start_x < end_x, 1, -1)
+        self.sy = numpy.where(start_y < end_y, 1, -1)
+        self.length = numpy.maximum(self.dx, self.dy)
+
+    # Get the points step points along each path, which can be an array broadcasting against the paths
+    def points(self, step):
+        moved_x, moved_y = game.path_offsets(self.dx, self.dy, step)
+        return self.start_x + self.sx * moved_x, self.start_y + self.sy * moved_y
+
+    # Pick some of the paths, adding an axis, so the points of each broadcast against other arrays
+    def select(self, indices):
+        paths = Paths.__new__(Paths)
+        for name, value in vars(self).items():
+            setattr(paths, name, value[indices, None])
+        return paths
+
+
+# Get the amount of ticks a missile moving speed points a tick takes to get from start to point,
+# counting the first tick, which leaves it at its start
+def flight_ticks(start_x, start_y, x, y, speed):
+    length = numpy.maximum(numpy.abs(x - start_x), numpy.abs(y - start_y))
+    return numpy.ceil((length + 1) / speed) - 1
+
+
+# Plan the clicks to make on the engine's next tick, firing at most max_shots missiles
+# Attack missiles are ignored if a player missile already in flight arrives within cover pixels of them
+def plan(engine, max_shots=2, cover=20):
+    global numpy
+    if numpy is None:
+        numpy = game.load_numpy()
+        if numpy is None:
+            raise ImportError("The autopilot requires numpy to be installed")
+
+    attacks = list(engine.attack_missiles)
+    silos = engine.silos
+    if not attacks or not len(engine.silo_index):
+        return []
+
+    # Every attack missile's path, and how far along it the missile is
+    # The axis which moves most moves on every point, so it counts the points moved so far
+    start_x, start_y, x, y, end_x, end_y, speed = numpy.array(
+        [(missile.start_position[0], missile.start_position[1], missile.pos[0], missile.pos[1],
+          missile.target[0], missile.target[1], missile.speed) for missile in attacks], dtype=numpy.float64).T
+    paths = Paths(start_x, start_y, end_x, end_y)
+    step = numpy.maximum(numpy.abs(x - paths.start_x), numpy.abs(y - paths.start_y))
+    landing = numpy.ceil((paths.length - step) / speed)
+
+    # Buildings left in every city which isn't destroyed, an attack explosion damages cities within its max range
+    # A city counts one more, for the hit which destroys it, so one with every building down is still defended
+    intact = [city for city in engine.cities if not city.destroyed]
+    if not intact:
+        return []
+    city_x, city_y = numpy.array([city.center for city in intact], dtype=numpy.float64).T
+    buildings = numpy.array([city.building_count - city.destroyed_buildings + 1 for city in intact])
+    blast = engine.explosion_radius * 2
+
+    # Buildings and cities each missile will damage where it lands
+    in_blast = (end_x[:, None] - city_x) ** 2 + (end_y[:, None] - city_y) ** 2 <= blast * blast
+    threat = (in_blast * buildings).sum(axis=1)
+
+    # Drop missiles a player missile in flight already meets, by where each will be once that missile arrives
+    player = list(engine.player_missiles)
+    if player:
+        launch_x, launch_y, player_x, player_y, aim_x, aim_y, player_speed = numpy.array(
+            [(missile.start_position[0], missile.start_position[1], missile.pos[0], missile.pos[1],
+              missile.target[0], missile.target[1], missile.speed) for missile in player], dtype=numpy.float64).T
+        arrival = numpy.maximum(flight_ticks(launch_x, launch_y, aim_x, aim_y, player_speed) -
+                                flight_ticks(launch_x, launch_y, player_x, player_y, player_speed), 0)
+        met_x, met_y = paths.select(slice(None)).points(step[:, None] + arrival * speed[:, None])
+        covered = ((met_x - aim_x) ** 2 + (met_y - aim_y) ** 2 <= cover * cover).any(axis=1)
+        threat[covered] = 0
+
+    targets = numpy.flatnonzero(threat)
+    if not len(targets):
+        return []
+
+    # Find the earliest tick each missile can be met from each silo, as (missiles, silos) arrays
+    # A shot aimed at where a missile will be in n ticks meets it if the shot gets there in at most n ticks.
+    # The shot's flight shrinks by at most a tick for every tick the missile comes closer,
+    # so the earliest such n is found by bisecting between now and the missile landing
+    launch_x, launch_y = numpy.array([silo.launchPosition for silo in silos], dtype=numpy.float64).T
+    paths = paths.select(targets)
+    step, speed, landing = step[targets, None], speed[targets, None], landing[targets, None]
+
+    low = numpy.zeros((len(targets), len(silos)))
+    high = numpy.repeat(landing, len(silos), axis=1)
+    for _ in range(int(landing.max()).bit_length() + 1):
+        middle = (low + high) // 2
+        point_x, point_y = paths.points(step + middle * speed)
+        reached = flight_ticks(launch_x, launch_y, point_x, point_y, engine.player_speed) <= middle
+        high = numpy.where(reached, middle, high)
+        low = numpy.where(reached, low, middle + 1)
+
+    point_x, point_y = paths.points(step + high * speed)
+    reached = flight_ticks(launch_x, launch_y, point_x, point_y, engine.player_speed) <= high
+
+    # The missile explodes where it is met, so it has to be met out of range of every city still standing
+    safe = ((point_x[..., None] - city_x) ** 2 + (point_y[..., None] - city_y) ** 2 > blast * blast).all(axis=2)
+    possible = reached & safe & (high < landing)
+
+    # Fire at the most threatening missiles which can be met first, then the ones landing soonest
+    # Only the few shots taken are picked in Python, so the arrays are turned into lists once
+    candidates = numpy.flatnonzero(possible.any(axis=1))
+    candidates = candidates[numpy.lexsort((landing[candidates, 0], -threat[targets[candidates]]))]
+    possible, high = possible[candidates].tolist(), high[candidates].tolist()
+    point_x, point_y = point_x[candidates].tolist(), point_y[candidates].tolist()
+
+    ammo = [silo.missiles for silo in silos]
+    clicks = []
+    for index in range(len(candidates)):
+        if len(clicks) == max_shots or not any(ammo):
+            break
+
+        # The engine fires from the silo nearest the click which has ammunition,
+        # so a silo can only take the shot if it would be the one picked
+        for silo in sorted(range(len(silos)), key=high[index].__getitem__):
+            if not possible[index][silo] or not ammo[silo]:
+                continue
+
+            aim = (int(point_x[index][silo]), int(point_y[index][silo]))
+            distances = [math.hypot(other.launchPosition[0] - aim[0], other.launchPosition[1] - aim[1])
+                         if ammo[order] else math.inf for order, other in enumerate(silos)]
+            if distances.index(min(distances)) != silo:
+                continue
+
+            ammo[silo] -= 1
+            clicks.append((game.LEFT_MOUSE_BUTTON, aim))
+            break
+    return clicks
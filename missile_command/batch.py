@@ -0,0 +1,181 @@
+# Runs many seeded, headless games in parallel and collects statistics about each one
+# Used to tune the gameplay settings, for example:
+#   python -m missile_command.batch --games 1000 --sweep spawn_delay=1000,1500 --sweep reload_delay=1000,1500 --csv games.csv
+
+# Imports
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# The batch runner never opens a window, so keep pygame quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from missile_command import autopilot, game
+
+# Settings which can be swept, and the type their values are read as
+settings = {
+    "rate": int,
+    "max_missiles": int,
+    "spawn_delay": int,
+    "reload_delay": int,
+    "repair_delay": int,
+    "explosion_radius": int,
+    "cities": int,
+    "silos": int,
+}
+
+# Statistics collected for every game
+statistics = ["cities_lost", "missiles_spawned", "missiles_fired", "missiles_intercepted", "ticks_survived"]
+
+
+# Defender which clicks a random point in the sky every so often
+def random_defender(engine, rng, interval=30):
+    if engine.tick % interval:
+        return []
+    return [(game.LEFT_MOUSE_BUTTON, (rng.randint(0, game.width), rng.randint(0, game.ground_height - 64)))]
+
+
+# Defender which fires at the attack missile closest to the ground,
+# aiming at where it will be when the player missile gets there
+def scripted_defender(engine, rng, interval=20):
+    if engine.tick % interval or not engine.attack_missiles:
+        return []
+
+    target = max(engine.attack_missiles, key=lambda missile: missile.pos[1])
+    x, y = target.pos
+    end_x, end_y = target.target
+
+    # Every point along a path is one tick, so flight time is the longest axis of the distance
+    silo = engine.silo_index.nearest(target.pos)
+    if silo is None:
+        return []
+    launch = silo.launchPosition
+
+    flight = max(abs(launch[0] - x), abs(launch[1] - y)) / engine.player_speed
+    lead = flight * target.speed
+    remaining = max(abs(end_x - x), abs(end_y - y))
+    if remaining <= lead:
+        aim = (end_x, end_y)
+    else:
+        aim = (x + (end_x - x) * lead / remaining, y + (end_y - y) * lead / remaining)
+
+    return [(game.LEFT_MOUSE_BUTTON, (int(aim[0]), int(aim[1])))]
+
+
+# Defender which solves where to meet every threatening attack missile at once, see autopilot.plan
+def autopilot_defender(engine, rng):
+    return autopilot.plan(engine)
+
+
+defenders = {
+    "random": random_defender,
+    "scripted": scripted_defender,
+    "autopilot": autopilot_defender,
+}
+
+
+# Play a single game until every city is destroyed or max_ticks have passed
+# Runs inside a worker process, so everything it needs is passed in the job
+def play(job):
+    config, seed, defender, max_ticks, backend = job
+    engine = game.Engine(backend=backend, seed=seed, **config)
+    rng = random.Random("defender-%d" % seed)
+    defend = defenders[defender]
+
+    while engine.tick < max_ticks and not engine.game_over():
+        engine.step(defend(engine, rng))
+
+    result = dict(config)
+    result.update({
+        "seed": seed,
+        "defender": defender,
+        "cities_lost": engine.cities_lost,
+        "missiles_spawned": engine.missiles_spawned,
+        "missiles_fired": engine.missiles_fired,
+        "missiles_intercepted": engine.missiles_intercepted,
+        "ticks_survived": engine.tick,
+    })
+    return result
+
+
+# Read a "name=value,value" sweep argument into a name and a list of values
+def parse_sweep(text):
+    name, _, values = text.partition("=")
+    if name not in settings:
+        raise argparse.ArgumentTypeError("unknown setting %r, expected one of %s" % (name, ", ".join(settings)))
+    return name, [settings[name](value) for value in values.split(",")]
+
+
+# Get every combination of swept settings
+def configurations(sweeps):
+    names = [name for name, _ in sweeps]
+    for values in itertools.product(*[values for _, values in sweeps]):
+        yield dict(zip(names, values))
+
+
+# Summarise the games played with each configuration
+def aggregate(results, names):
+    groups = {}
+    for result in results:
+        key = tuple(result[name] for name in names)
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for key, games in groups.items():
+        entry = dict(zip(names, key))
+        entry["games"] = len(games)
+        for statistic in statistics:
+            values = [game[statistic] for game in games]
+            entry[statistic] = {
+                "mean": sum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+            }
+        summary.append(entry)
+    return summary
+
+
+def run(arguments):
+    parser = argparse.ArgumentParser(description="Run seeded headless Missile Command games in parallel")
+    parser.add_argument("--games", type=int, default=100, help="games to play for each configuration")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--ticks", type=int, default=60 * 60 * 5, help="maximum ticks per game")
+    parser.add_argument("--defender", choices=sorted(defenders), default="scripted")
+    parser.add_argument("--backend", choices=["python", "numpy"], default="python")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--sweep", type=parse_sweep, action="append", default=[],
+                        help="setting to sweep, for example spawn_delay=1000,1500")
+    parser.add_argument("--csv", help="file to write every game to")
+    parser.add_argument("--json", help="file to write the summary of each configuration to")
+    options = parser.parse_args(arguments)
+
+    names = [name for name, _ in options.sweep]
+    jobs = [(config, options.seed + game, options.defender, options.ticks, options.backend)
+            for config in configurations(options.sweep)
+            for game in range(options.games)]
+
+    with ProcessPoolExecutor(max_workers=options.workers) as executor:
+        results = list(executor.map(play, jobs, chunksize=max(1, len(jobs) // 256)))
+
+    if options.csv:
+        with open(options.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=names + ["seed", "defender"] + statistics)
+            writer.writeheader()
+            writer.writerows(results)
+
+    summary = aggregate(results, names)
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(summary, file, indent=4)
+    else:
+        json.dump(summary, sys.stdout, indent=4)
+        print()
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
@@ -0,0 +1,182 @@
+# Measures how the game scales with the amount of missiles and explosions
+# Each scenario is built from a seed, so runs can be compared against each other, for example:
+#   python -m missile_command.benchmark --output before.json
+#   python -m missile_command.benchmark --output after.json --backend numpy
+
+# Imports
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# The benchmarks only ever draw to surfaces in memory, so keep pygame quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from missile_command import game
+
+# Scenarios as (name, attack missiles, explosions)
+scenarios = [
+    ("missiles-10", 10, 0),
+    ("missiles-100", 100, 0),
+    ("missiles-1000", 1000, 0),
+    ("missiles-10000", 10000, 0),
+    ("explosions-100", 1000, 100),
+    ("explosions-1000", 1000, 1000),
+]
+
+
+# Build an engine holding a fixed set of missiles and explosions
+# Attack missiles start above the screen and need more ticks than any benchmark runs to land,
+# and explosions are the player's, so they never damage the cities
+def build(missiles, explosions, seed, backend):
+    engine = game.Engine(backend=backend, seed=seed, max_missiles=0)
+    rng = random.Random(seed)
+
+    for _ in range(missiles):
+        start = [rng.randint(0, game.width), game.ground_height - game.height]
+        end = [rng.randint(0, game.width), game.ground_height]
+        path = engine.createPath(start, end, engine.attack_speed)
+        engine.attack_missiles.spawn(game.Missile(start, end, path=path, speed=engine.attack_speed))
+
+    for _ in range(explosions):
+        pos = [rng.randint(0, game.width), rng.randint(0, game.ground_height)]
+        explosion = game.Explosion(pos, engine.explosion_radius, game.Missile(pos, pos, is_player=True), rng)
+        explosion.radius = rng.randint(1, engine.explosion_radius)
+        engine.explosions.spawn(explosion)
+
+    return engine
+
+
+# Move every missile and explosion, without checking any collisions
+def update(engine, surface, renderer):
+    if engine.store is not None:
+        engine.store.advance()
+
+    for missile in list(engine.attack_missiles):
+        missile.update(engine)
+
+    for explosion in list(engine.explosions):
+        explosion.update(engine)
+
+
+# Check every explosion against the attack missiles, without removing anything
+def collide(engine, surface, renderer):
+    engine.grid.build(engine.attack_missiles)
+
+    hits = 0
+    for explosion in engine.explosions:
+        for attack in engine.grid.query(explosion.pos, explosion.radius * 2):
+            if explosion.in_range(attack):
+                hits += 1
+    return hits
+
+
+# Draw everything onto a surface in memory
+def render(engine, surface, renderer):
+    game.draw(engine, surface)
+
+
+# Draw only what changed onto a surface in memory, moving everything between frames
+def render_dirty(engine, surface, renderer):
+    renderer.draw(engine)
+
+
+# Run whole ticks of the game
+def step(engine, surface, renderer):
+    engine.step()
+
+
+# Benchmarks as (name, function, whether the scene moves between timed ticks)
+benchmarks = [
+    ("update", update, False),
+    ("collision", collide, False),
+    ("render", render, False),
+    ("render_dirty", render_dirty, True),
+    ("step", step, False),
+]
+
+
+# Time a benchmark on a freshly built scenario, returning its result
+def measure(scenario, benchmark, ticks, seed, backend):
+    name, missiles, explosions = scenario
+    label, function, moving = benchmark
+
+    engine = build(missiles, explosions, seed, backend)
+    surface = pygame.Surface((game.width, game.height))
+    renderer = game.Renderer(surface)
+
+    # One untimed tick, so caches and sprites are warm
+    function(engine, surface, renderer)
+
+    elapsed = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        function(engine, surface, renderer)
+        elapsed += time.perf_counter() - start
+
+        # Moving the scene isn't part of what is being measured
+        if moving:
+            update(engine, surface, renderer)
+
+    return {
+        "scenario": name,
+        "benchmark": label,
+        "backend": backend,
+        "attack_missiles": missiles,
+        "explosions": explosions,
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed else None,
+    }
+
+
+def run(arguments):
+    parser = argparse.ArgumentParser(description="Benchmark Missile Command with growing amounts of entities")
+    parser.add_argument("--ticks", type=int, default=100, help="timed ticks for each benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed every scenario is built from")
+    parser.add_argument("--backend", choices=["python", "numpy"], action="append",
+                        help="missile backend to measure, can be given more than once")
+    parser.add_argument("--scenario", choices=[name for name, _, _ in scenarios], action="append",
+                        help="only run this scenario, can be given more than once")
+    parser.add_argument("--benchmark", choices=[name for name, _, _ in benchmarks], action="append",
+                        help="only run this benchmark, can be given more than once")
+    parser.add_argument("--output", help="file to write the results to as json")
+    options = parser.parse_args(arguments)
+
+    results = []
+    for backend in options.backend or ["python"]:
+        for scenario in scenarios:
+            if options.scenario and scenario[0] not in options.scenario:
+                continue
+
+            for benchmark in benchmarks:
+                if options.benchmark and benchmark[0] not in options.benchmark:
+                    continue
+
+                result = measure(scenario, benchmark, options.ticks, options.seed, backend)
+                results.append(result)
+                print("%-8s %-16s %-13s %12.1f ticks/s" %
+                      (backend, scenario[0], benchmark[0], result["ticks_per_second"] or 0))
+
+    if options.output:
+        report = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": game.load_numpy().__version__ if game.load_numpy() is not None else None,
+            "platform": platform.platform(),
+            "ticks": options.ticks,
+            "seed": options.seed,
+            "results": results,
+        }
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
@@ -0,0 +1,217 @@
+# Captures the frames drawn by the game to disk, for reviewing sessions or building datasets
+# Each captured frame is copied once, straight out of the screen's own pixels, into a preallocated ring buffer,
+# and a worker thread writes it out, so drawing never waits on encoding or the disk.
+# Frames are written as:
+#   raw   - a single file of uncompressed frames, holding the 32 bit pixels exactly as the screen stores them
+#   png   - a directory holding one PNG image per frame
+#   delta - a single file of frames XORed with the frame before them and zlib compressed,
+#           which is tiny as most of the screen doesn't change between frames
+# Raw and delta files can be read back with read_frames.
+
+# Imports
+import os
+import queue
+import struct
+import threading
+import zlib
+
+from missile_command import game
+
+# NumPy is loaded by the first FrameCapture, as pygame.surfarray needs it
+numpy = None
+
+capture_formats = ("raw", "png", "delta")
+frames_magic = {"raw": b"MCFR", "delta": b"MCFD"}
+frames_header = struct.Struct("<4sBHHBBB")
+frames_frame = struct.Struct("<II")
+frames_version = 1
+
+
+# Load NumPy, which capturing and reading frames can't work without
+def require_numpy():
+    global numpy
+    numpy = game.load_numpy()
+    if numpy is None:
+        raise ImportError("Capturing frames requires numpy to be installed")
+
+
+# Turn rows of 32 bit pixels into an array of RGB pixels, using the bit shift of each colour
+def to_rgb(pixels, shifts):
+    return numpy.stack([(pixels >> shift).astype(numpy.uint8) for shift in shifts], axis=-1)
+
+
+# Writes frames handed over by a FrameCapture, in the order they were captured
+class FrameWriter(threading.Thread):
+
+    # Write frames to path in format, with the red, green and blue bits of each pixel at shifts
+    # ready and free are the queues of filled and empty ring buffer slots
+    def __init__(self, path, format, shifts, slots, ready, free):
+        super().__init__(name="capture", daemon=True)
+        self.path = path
+        self.format = format
+        self.shifts = shifts
+        self.slots = slots
+        self.ready = ready
+        self.free = free
+        self.error = None
+        self.written = 0
+
+        rows, columns = slots[0].shape
+        if format == "png":
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        else:
+            self.file = open(path, "wb")
+            self.file.write(frames_header.pack(frames_magic[format], frames_version, columns, rows, *shifts))
+
+        # Last frame written, which the delta format stores the difference from
+        self.previous = numpy.zeros_like(slots[0]) if format == "delta" else None
+
+    # Write the frames from the ring buffer until None is handed over
+    def run(self):
+        try:
+            while True:
+                item = self.ready.get()
+                if item is None:
+                    break
+
+                slot, frame = item
+                try:
+                    self.write(self.slots[slot], frame)
+                finally:
+                    self.free.put(slot)
+                self.written += 1
+        except Exception as error:
+            self.error = error
+
+            # Keep emptying the ring buffer, so the game never waits on a writer which stopped
+            while self.ready.get() is not None:
+                pass
+        finally:
+            if self.file is not None:
+                self.file.close()
+
+    # Write pixels, rows of 32 bit pixels, as the frame'th frame drawn
+    def write(self, pixels, frame):
+        if self.format == "png":
+            rows, columns = pixels.shape
+            image = game.pygame.image.frombuffer(to_rgb(pixels, self.shifts).tobytes(), (columns, rows), "RGB")
+            game.pygame.image.save(image, os.path.join(self.path, "frame_%06d.png" % frame))
+            return
+
+        # The arrays are handed over as they are, without copying them into bytes first
+        if self.format == "raw":
+            data = memoryview(pixels).cast("B")
+        else:
+            delta = numpy.bitwise_xor(pixels, self.previous)
+            self.previous[...] = pixels
+            data = zlib.compress(delta, 1)
+
+        self.file.write(frames_frame.pack(frame, len(data)))
+        self.file.write(data)
+
+
+# Captures every every'th frame of a surface, shrunk scale times, into a ring buffer of capacity frames
+# If the writer falls behind and the ring buffer is full, frames are dropped instead of waiting for it,
+# unless wait is set, for capturing a replay where every frame matters more than how fast it runs
+class FrameCapture:
+
+    def __init__(self, path, format="delta", every=1, scale=1, capacity=64, wait=False):
+        require_numpy()
+        if format not in capture_formats:
+            raise ValueError("Unknown capture format %r, expected one of %s" % (format, ", ".join(capture_formats)))
+
+        self.path = path
+        self.format = format
+        self.every = max(1, every)
+        self.scale = max(1, scale)
+        self.capacity = capacity
+        self.wait = wait
+
+        # Frames given to capture, frames captured, and frames dropped as the ring buffer was full
+        self.frame = 0
+        self.captured = 0
+        self.dropped = 0
+
+        # The ring buffer and writer are made by the first frame, once the surface is known
+        self.slots = None
+        self.ready = queue.Queue()
+        self.free = queue.Queue()
+        self.writer = None
+
+    # Make the ring buffer for frames of shape (rows, columns) from surface, and start the writer
+    def start(self, surface, shape):
+        if surface.get_bytesize() != 4:
+            raise ValueError("Capturing frames needs a 32 bit surface, not %d bit" % surface.get_bitsize())
+
+        self.slots = [numpy.empty(shape, dtype=numpy.uint32) for _ in range(self.capacity)]
+        for slot in range(self.capacity):
+            self.free.put(slot)
+        self.writer = FrameWriter(self.path, self.format, surface.get_shifts()[:3], self.slots, self.ready, self.free)
+        self.writer.start()
+
+    # Capture the frame drawn onto surface, if it is one of the frames being kept
+    # The surface's pixels are read through a view of them, which the transpose turns into rows,
+    # so without scaling copying a frame is a single block copy
+    def capture(self, surface):
+        frame = self.frame
+        self.frame += 1
+        if frame % self.every:
+            return
+
+        if self.writer is not None and self.writer.error is not None:
+            raise self.writer.error
+
+        # The view locks the surface, so it only lives for as long as the copy
+        pixels = game.pygame.surfarray.pixels2d(surface).T[::self.scale, ::self.scale]
+        if self.writer is None:
+            self.start(surface, pixels.shape)
+
+        try:
+            slot = self.free.get(self.wait)
+        except queue.Empty:
+            self.dropped += 1
+            return
+        numpy.copyto(self.slots[slot], pixels)
+        del pixels
+
+        self.ready.put((slot, frame))
+        self.captured += 1
+
+    # Wait for every captured frame to be written, and stop the writer
+    def close(self):
+        if self.writer is None:
+            return
+
+        self.ready.put(None)
+        self.writer.join()
+        writer, self.writer = self.writer, None
+        if writer.error is not None:
+            raise writer.error
+        print("Captured %d frames to %s, dropping %d" % (self.captured, self.path, self.dropped))
+
+
+# Read a raw or delta capture, yielding the number of every frame in it
+# and its pixels as a (width, height, 3) array of RGB, the same layout as pygame.surfarray.array3d
+def read_frames(path):
+    require_numpy()
+
+    with open(path, "rb") as file:
+        magic, version, columns, rows, *shifts = frames_header.unpack(file.read(frames_header.size))
+        formats = {magic: format for format, magic in frames_magic.items()}
+        if magic not in formats or version != frames_version:
+            raise ValueError("%s is not a version %d frame capture" % (path, frames_version))
+
+        pixels = numpy.zeros((rows, columns), dtype=numpy.uint32)
+        while True:
+            header = file.read(frames_frame.size)
+            if len(header) < frames_frame.size:
+                return
+
+            frame, length = frames_frame.unpack(header)
+            data = file.read(length)
+            if formats[magic] == "delta":
+                pixels ^= numpy.frombuffer(zlib.decompress(data), dtype=numpy.uint32).reshape(rows, columns)
+            else:
+                pixels = numpy.frombuffer(data, dtype=numpy.uint32).reshape(rows, columns)
+            yield frame, to_rgb(pixels, shifts).transpose(1, 0, 2)
@@ -0,0 +1,427 @@
+# Runs many independent games in lockstep, with the state of every game stacked in NumPy arrays
+# Follows the same rules as Engine, but a tick of every game at once is a handful of array operations,
+# so there is no Python work per game. Used for training defenders, for example:
+#   environment = BatchEnvironment(256, seed=0)
+#   observation = environment.reset()
+#   observation, rewards, dones = environment.step(actions)
+
+# Imports
+from missile_command import game
+
+# NumPy is loaded by the first BatchEnvironment, as the game only imports it when needed
+numpy = None
+
+
+# Split indices into groups in which no game repeats, keeping their order,
+# so each group can be handled with a single array operation per game
+def layers(games):
+    if not len(games):
+        return []
+
+    order = numpy.argsort(games, kind="stable")
+    ordered = games[order]
+    starts = numpy.flatnonzero(numpy.r_[True, ordered[1:] != ordered[:-1]])
+    counts = numpy.diff(numpy.r_[starts, len(games)])
+
+    # How many times each game has already appeared before each index
+    rank = numpy.empty(len(games), dtype=numpy.int64)
+    rank[order] = numpy.arange(len(games)) - numpy.repeat(starts, counts)
+    return [numpy.flatnonzero(rank == layer) for layer in range(rank.max() + 1)]
+
+
+# Missiles of every game, as (games, capacity) arrays
+# Paths are moved with game.path_offsets like MissileStore, so missiles land on the same points as Bresenham
+class MissileArrays:
+
+    floats = ("start_x", "start_y", "x", "y", "target_x", "target_y", "dx", "dy", "sx", "sy", "length")
+    integers = ("calls", "speed")
+    flags = ("end", "alive")
+
+    # Initialize empty arrays with room for capacity missiles in each game
+    def __init__(self, games, capacity):
+        self.games = games
+        self.capacity = 0
+        for name in self.floats + self.integers + self.flags:
+            setattr(self, name, None)
+        self.grow(capacity)
+
+    # Resize every array to hold capacity missiles in each game, keeping existing values
+    def grow(self, capacity):
+        old = self.capacity
+        for names, dtype in ((self.floats, numpy.float64), (self.integers, numpy.int64), (self.flags, bool)):
+            for name in names:
+                array = numpy.zeros((self.games, capacity), dtype=dtype)
+                if old:
+                    array[:, :old] = getattr(self, name)
+                setattr(self, name, array)
+        self.capacity = capacity
+
+    # Add a missile to each game in games, which must not repeat, returning the slot each was put in
+    def add(self, games, start_x, start_y, end_x, end_y, speed):
+        free = ~self.alive[games]
+        while not free.any(axis=1).all():
+            self.grow(self.capacity * 2)
+            free = ~self.alive[games]
+        slots = numpy.argmax(free, axis=1)
+
+        # Same starting state as Bresenham.__init__, on whole pixels
+        start_x, start_y, end_x, end_y = (numpy.floor(value + 0.5) for value in (start_x, start_y, end_x, end_y))
+        self.start_x[games, slots] = self.x[games, slots] = start_x
+        self.start_y[games, slots] = self.y[games, slots] = start_y
+        self.target_x[games, slots] = end_x
+        self.target_y[games, slots] = end_y
+        self.dx[games, slots] = numpy.abs(end_x - start_x)
+        self.dy[games, slots] = numpy.abs(end_y - start_y)
+        self.sx[games, slots] = numpy.where(start_x < end_x, 1, -1)
+        self.sy[games, slots] = numpy.where(start_y < end_y, 1, -1)
+        self.length[games, slots] = numpy.maximum(self.dx[games, slots], self.dy[games, slots])
+        self.calls[games, slots] = 0
+        self.speed[games, slots] = speed
+        self.end[games, slots] = False
+        self.alive[games, slots] = True
+        return slots
+
+    # Advance every missile in mask by its speed
+    def advance(self, mask):
+        games, slots = numpy.nonzero(mask)
+        if not len(games):
+            return
+
+        calls = self.calls[games, slots] + self.speed[games, slots]
+        self.calls[games, slots] = calls
+
+        moved_x, moved_y = game.path_offsets(self.dx[games, slots], self.dy[games, slots], calls - 1)
+        self.x[games, slots] = self.start_x[games, slots] + self.sx[games, slots] * moved_x
+        self.y[games, slots] = self.start_y[games, slots] + self.sy[games, slots] * moved_y
+        self.end[games, slots] = calls - 1 > self.length[games, slots]
+
+    # Remove every missile of the games in mask
+    def clear(self, mask):
+        self.alive[mask] = False
+
+
+# Explosions of every game, as (games, capacity) arrays
+class ExplosionArrays:
+
+    # Initialize empty arrays with room for capacity explosions in each game
+    def __init__(self, games, capacity):
+        self.games = games
+        self.capacity = 0
+        self.x = self.y = self.radius = None
+        self.increasing = self.player = self.alive = None
+        self.grow(capacity)
+
+    # Resize every array to hold capacity explosions in each game, keeping existing values
+    def grow(self, capacity):
+        old = self.capacity
+        for name, dtype in (("x", numpy.float64), ("y", numpy.float64), ("radius", numpy.float64),
+                            ("increasing", bool), ("player", bool), ("alive", bool)):
+            array = numpy.zeros((self.games, capacity), dtype=dtype)
+            if old:
+                array[:, :old] = getattr(self, name)
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    # Add an explosion to each game in games, which must not repeat, returning the slot each was put in
+    def add(self, games, x, y, radius, player):
+        free = ~self.alive[games]
+        while not free.any(axis=1).all():
+            self.grow(self.capacity * 2)
+            free = ~self.alive[games]
+        slots = numpy.argmax(free, axis=1)
+
+        self.x[games, slots] = x
+        self.y[games, slots] = y
+        self.radius[games, slots] = radius
+        self.increasing[games, slots] = True
+        self.player[games, slots] = player
+        self.alive[games, slots] = True
+        return slots
+
+    # Remove every explosion of the games in mask
+    def clear(self, mask):
+        self.alive[mask] = False
+
+
+# Many games of Missile Command played at once, each with its own state
+# Every step takes one action per game, as rows of (button, x, y) where button 0 is no click,
+# and returns the observation of every game, the reward each earned that tick and whether it finished
+# Finished games are started again straight away, so the observation of a finished game is its new start
+class BatchEnvironment:
+
+    # Reward for every attack missile intercepted, and for every building destroyed
+    intercept_reward = 1.0
+    building_reward = -1.0
+
+    # Initialize games copies of the game, the settings are the same as Engine's
+    # seed makes every random choice repeatable, and games finish after max_ticks if it is given
+    def __init__(self, games, seed=None, rate=game.tick_rate, max_missiles=game.max_attack_missiles,
+                 spawn_delay=game.spawn_delay, reload_delay=game.reload_delay, repair_delay=game.repair_delay,
+                 explosion_radius=game.explosion_radius, cities=3, silos=2, max_ticks=None):
+        global numpy
+        numpy = game.load_numpy()
+        if numpy is None:
+            raise ImportError("BatchEnvironment requires numpy to be installed")
+
+        self.games = games
+        self.random = numpy.random.default_rng(seed)
+        self.tick_rate = rate
+        self.max_missiles = max_missiles
+        self.spawn_delay = spawn_delay
+        self.reload_delay = reload_delay
+        self.repair_delay = repair_delay
+        self.explosion_radius = explosion_radius
+        self.max_ticks = max_ticks
+        self.player_speed = 1
+        self.attack_speed = 1
+
+        # Cities and silos are placed the same in every game, so they are taken from a single engine
+        template = game.Engine(rate, cities=cities, silos=silos, explosion_radius=explosion_radius)
+        self.city_x = numpy.array([city.center[0] for city in template.cities], dtype=numpy.float64)
+        self.city_y = numpy.array([city.center[1] for city in template.cities], dtype=numpy.float64)
+        self.city_rects = numpy.array([tuple(city.rect) for city in template.cities], dtype=numpy.float64)
+        self.building_count = template.cities[0].building_count
+        self.silo_x = numpy.array([silo.launchPosition[0] for silo in template.silos], dtype=numpy.float64)
+        self.silo_y = numpy.array([silo.launchPosition[1] for silo in template.silos], dtype=numpy.float64)
+        self.silo_ammo = template.silos[0].max_missiles
+
+        city_count, silo_count = len(template.cities), len(template.silos)
+        self.tick = numpy.zeros(games, dtype=numpy.int64)
+        self.last_spawn = numpy.zeros(games, dtype=numpy.int64)
+        self.buildings = numpy.zeros((games, city_count, self.building_count), dtype=bool)
+        self.destroyed_buildings = numpy.zeros((games, city_count), dtype=numpy.int64)
+        self.destroyed = numpy.zeros((games, city_count), dtype=bool)
+        self.repairing = numpy.zeros((games, city_count), dtype=bool)
+        self.repair_start = numpy.zeros((games, city_count), dtype=numpy.int64)
+        self.ammo = numpy.zeros((games, silo_count), dtype=numpy.int64)
+        self.reload_time = numpy.zeros((games, silo_count), dtype=numpy.int64)
+
+        # Attack missiles never go over max_missiles, player missiles and explosions grow as needed
+        self.attack_missiles = MissileArrays(games, max(1, max_missiles))
+        self.player_missiles = MissileArrays(games, 16)
+        self.explosions = ExplosionArrays(games, 32)
+
+        # Counters kept for statistics, since each game last started
+        self.missiles_spawned = numpy.zeros(games, dtype=numpy.int64)
+        self.missiles_fired = numpy.zeros(games, dtype=numpy.int64)
+        self.missiles_intercepted = numpy.zeros(games, dtype=numpy.int64)
+        self.cities_lost = numpy.zeros(games, dtype=numpy.int64)
+
+        # Rewards earned during the current step
+        self.rewards = numpy.zeros(games, dtype=numpy.float64)
+        self.reset()
+
+    # Simulated time in milliseconds of every game
+    @property
+    def now(self):
+        return self.tick * 1000 // self.tick_rate
+
+    # Start the games in mask again, or every game, returning the observation
+    def reset(self, mask=None):
+        if mask is None:
+            mask = numpy.ones(self.games, dtype=bool)
+
+        self.tick[mask] = 0
+        self.last_spawn[mask] = 0
+        self.buildings[mask] = False
+        self.destroyed_buildings[mask] = 0
+        self.destroyed[mask] = False
+        self.repairing[mask] = False
+        self.ammo[mask] = self.silo_ammo
+        self.reload_time[mask] = 0
+        self.attack_missiles.clear(mask)
+        self.player_missiles.clear(mask)
+        self.explosions.clear(mask)
+        for counter in (self.missiles_spawned, self.missiles_fired, self.missiles_intercepted, self.cities_lost):
+            counter[mask] = 0
+        return self.observe()
+
+    # Get the state of every game as a dictionary of arrays, with the games along the first axis
+    # The second axis of the player missiles and explosions grows when a game needs more of them
+    def observe(self):
+        attack = self.attack_missiles
+        player = self.player_missiles
+        explosions = self.explosions
+        return {
+            "tick": self.tick.copy(),
+            "cities": ~self.destroyed,
+            "buildings": ~self.buildings,
+            "repairing": self.repairing.copy(),
+            "ammo": self.ammo.copy(),
+            "attack_missiles": numpy.stack([attack.x, attack.y], axis=-1),
+            "attack_targets": numpy.stack([attack.target_x, attack.target_y], axis=-1),
+            "attack_alive": attack.alive.copy(),
+            "player_missiles": numpy.stack([player.x, player.y], axis=-1),
+            "player_alive": player.alive.copy(),
+            "explosions": numpy.stack([explosions.x, explosions.y, explosions.radius], axis=-1),
+            "explosion_alive": explosions.alive.copy(),
+        }
+
+    # Start an explosion at each (game, x, y), damaging the cities it reaches unless the player caused it
+    def explode(self, games, x, y, player):
+        slots = numpy.empty(len(games), dtype=numpy.int64)
+        for layer in layers(games):
+            radius = self.random.integers(1, 10, len(layer))
+            slots[layer] = self.explosions.add(games[layer], x[layer], y[layer], radius, player[layer])
+
+            attack = layer[~player[layer]]
+            if len(attack):
+                self.damage(games[attack], x[attack], y[attack])
+        return slots
+
+    # Damage every city within the max range of an explosion in each game, which must not repeat
+    def damage(self, games, x, y):
+        reach = self.explosion_radius * 2
+        for city in range(len(self.city_x)):
+            close = (self.city_x[city] - x) ** 2 + (self.city_y[city] - y) ** 2 <= reach * reach
+            hit = games[close & ~self.destroyed[games, city]]
+            if not len(hit):
+                continue
+
+            # Cities with every building down are destroyed by the next hit, the rest lose a random building
+            full = self.destroyed_buildings[hit, city] == self.building_count
+            lost = hit[full]
+            self.destroyed[lost, city] = True
+            self.cities_lost[lost] += 1
+
+            standing = hit[~full]
+            building = self.random.integers(0, self.building_count, len(standing))
+            fresh = ~self.buildings[standing, city, building]
+            self.buildings[standing, city, building] = True
+            self.destroyed_buildings[standing, city] += fresh
+            self.rewards[standing] += self.building_reward * fresh
+
+    # Explode and remove the missiles at each (game, slot)
+    def detonate(self, missiles, games, slots, player):
+        missiles.alive[games, slots] = False
+        return self.explode(games, missiles.x[games, slots], missiles.y[games, slots],
+                            numpy.full(len(games), player))
+
+    # Advance every game by a single tick, returning the observation, rewards and done flags
+    # actions is an array of (button, x, y) for each game, using the same buttons as pygame
+    def step(self, actions):
+        actions = numpy.asarray(actions, dtype=numpy.int64).reshape(self.games, 3)
+        attack = self.attack_missiles
+        player = self.player_missiles
+        explosions = self.explosions
+        now = self.now
+        self.rewards[:] = 0
+
+        # Spawn an attack missile in every game where the spawn delay has passed and there is room for one,
+        # aimed at the closest city which isn't destroyed
+        intact = ~self.destroyed
+        spawning = ((now - self.last_spawn >= self.spawn_delay) & (attack.alive.sum(axis=1) < self.max_missiles)
+                    & intact.any(axis=1))
+        games = numpy.flatnonzero(spawning)
+        if len(games):
+            start_x = self.random.integers(0, game.width + 1, len(games)).astype(numpy.float64)
+            start_y = float(game.ground_height - game.height)
+            distance = numpy.hypot(self.city_x - start_x[:, None], self.city_y - start_y)
+            distance[~intact[games]] = numpy.inf
+            end_x = self.city_x[numpy.argmin(distance, axis=1)]
+            attack.add(games, start_x, start_y, end_x, float(game.ground_height), self.attack_speed)
+            self.last_spawn[games] = now[games]
+            self.missiles_spawned[games] += 1
+
+        # Left clicks launch from the closest silo with ammunition
+        buttons, click_x, click_y = actions[:, 0], actions[:, 1], actions[:, 2]
+        games = numpy.flatnonzero(buttons == game.LEFT_MOUSE_BUTTON)
+        if len(games):
+            distance = numpy.hypot(self.silo_x - click_x[games, None], self.silo_y - click_y[games, None])
+            distance[self.ammo[games] <= 0] = numpy.inf
+            silos = numpy.argmin(distance, axis=1)
+            loaded = numpy.isfinite(distance[numpy.arange(len(games)), silos])
+            games, silos = games[loaded], silos[loaded]
+
+            player.add(games, self.silo_x[silos], self.silo_y[silos], click_x[games].astype(numpy.float64),
+                       click_y[games].astype(numpy.float64), self.player_speed)
+            self.ammo[games, silos] -= 1
+            self.reload_time[games, silos] = now[games]
+            self.missiles_fired[games] += 1
+
+        # Right clicks repair the destroyed city under the cursor
+        left, top = self.city_rects[:, 0], self.city_rects[:, 1]
+        right, bottom = left + self.city_rects[:, 2], top + self.city_rects[:, 3]
+        inside = ((click_x[:, None] >= left) & (click_x[:, None] < right)
+                  & (click_y[:, None] >= top) & (click_y[:, None] < bottom))
+        repair = inside & (buttons == game.RIGHT_MOUSE_BUTTON)[:, None] & self.destroyed & ~self.repairing
+        self.repairing |= repair
+        self.repair_start[repair] = numpy.broadcast_to(now[:, None], repair.shape)[repair]
+
+        # Finish repairs which have taken the repair delay
+        repaired = self.repairing & (now[:, None] - self.repair_start >= self.repair_delay)
+        self.repairing &= ~repaired
+        self.destroyed &= ~repaired
+        self.buildings[repaired] = False
+        self.destroyed_buildings[repaired] = 0
+
+        # Player missiles which reached their target explode, the rest move and check for attack missiles
+        games, slots = numpy.nonzero(player.alive & player.end)
+        self.detonate(player, games, slots, True)
+        moving = player.alive & ~player.end
+        player.advance(moving)
+
+        # A player missile takes the first attack missile close enough to it, one player missile at a time
+        reach = ((10 - 5) * 2) ** 2
+        for slot in numpy.flatnonzero(moving.any(axis=0)):
+            active = moving[:, slot] & player.alive[:, slot]
+            close = (attack.alive & active[:, None]
+                     & ((attack.x - player.x[:, slot, None]) ** 2 + (attack.y - player.y[:, slot, None]) ** 2
+                        <= reach))
+            games = numpy.flatnonzero(close.any(axis=1))
+            if not len(games):
+                continue
+
+            targets = numpy.argmax(close[games], axis=1)
+            self.detonate(player, games, numpy.full(len(games), slot), True)
+            self.detonate(attack, games, targets, False)
+            self.missiles_intercepted[games] += 1
+            self.rewards[games] += self.intercept_reward
+
+        # Attack missiles which reached the ground explode, the rest move
+        games, slots = numpy.nonzero(attack.alive & attack.end)
+        self.detonate(attack, games, slots, False)
+        attack.advance(attack.alive & ~attack.end)
+
+        # Grow and shrink every explosion, then explode attack missiles inside them
+        # Explosions started by those missiles are updated the same tick, until nothing else is caught
+        updating = explosions.alive.copy()
+        while updating.any():
+            radius = explosions.radius
+            full = updating & (radius >= self.explosion_radius)
+            explosions.increasing &= ~full
+            explosions.alive &= ~(updating & ~full & (radius < 0))
+            radius += numpy.where(updating, numpy.where(explosions.increasing, 0.5, -0.5), 0)
+
+            games, slots = numpy.nonzero(updating & (radius >= 0))
+            reach = (radius[games, slots] * 2) ** 2
+            close = numpy.zeros_like(attack.alive)
+            for layer in layers(games):
+                g, s = games[layer], slots[layer]
+                close[g] |= (attack.alive[g]
+                             & ((attack.x[g] - explosions.x[g, s, None]) ** 2
+                                + (attack.y[g] - explosions.y[g, s, None]) ** 2 <= reach[layer, None]))
+
+            games, targets = numpy.nonzero(close)
+            caught = numpy.bincount(games, minlength=self.games)
+            self.missiles_intercepted += caught
+            self.rewards += self.intercept_reward * caught
+
+            slots = self.detonate(attack, games, targets, False)
+            updating = numpy.zeros_like(explosions.alive)
+            updating[games, slots] = True
+
+        # Reload a missile into every silo whose reload delay has passed
+        reloading = (now[:, None] - self.reload_time >= self.reload_delay) & (self.ammo < self.silo_ammo)
+        self.ammo += reloading
+
+        # Progress every game onto the next tick, and start finished games again
+        self.tick += 1
+        dones = self.destroyed.all(axis=1)
+        if self.max_ticks is not None:
+            dones |= self.tick >= self.max_ticks
+
+        rewards = self.rewards.copy()
+        if dones.any():
+            self.reset(dones)
+        return self.observe(), rewards, dones
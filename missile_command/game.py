@@ -0,0 +1,2403 @@
+# Imports
+import argparse
+import bisect
+import csv
+import heapq
+import math
+import queue
+import random
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+# Stands in for pygame until something uses it, as importing pygame takes far longer than the rest of the game
+# The first use imports pygame and replaces this with the real module
+class LazyPygame:
+
+    def __getattr__(self, name):
+        global pygame
+        import pygame as module
+        pygame = module
+        return getattr(module, name)
+
+
+pygame = LazyPygame()
+
+# NumPy is optional, it is only needed by the vectorized missile backend,
+# so it isn't imported until a MissileStore is created
+numpy = None
+
+
+# Import NumPy the first time it is needed, returning None if it isn't installed
+def load_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+    return numpy
+
+
+ramp_one, ramp_two, ramp_three = None, None, None
+
+# Width of the window defined to be 1280
+# Height of the window defined to be 720
+width, height = 1280, 720
+
+# Window, created once the game is started by open_window
+screen = None
+
+# Pygame clock - This helps keep track of time in the program
+clock = None
+
+# Explosion variables
+maxRadius = 60
+
+# Amount of pixels above the height of the window
+ground_height = height - 32
+
+# Pygame event integers
+LEFT_MOUSE_BUTTON = 1
+RIGHT_MOUSE_BUTTON = 3
+
+# Amount of simulation ticks per second, the display loop runs at this rate
+tick_rate = 60
+
+# Most ticks simulated in a single frame when catching up, so a slow frame can't make every frame after it slower
+max_catch_up = 5
+
+# Detail levels the renderer steps down through while frames take longer than they should,
+# each one leaves out everything the levels before it do
+# Explosions piled up in the same place are drawn as the biggest of them
+detail_full = 0
+detail_merged_explosions = 1
+# Trails only reach a short way behind their missiles
+detail_short_trails = 2
+# Repair bars and ammunition are only drawn again every few frames, or when something drew over them
+detail_lazy_hud = 3
+
+# Gameplay settings, each Engine can override these
+# Timings are in milliseconds
+max_attack_missiles = 5
+spawn_delay = 1500
+reload_delay = 1500
+repair_delay = 4000
+explosion_radius = 80
+
+"""
+    Thanks to Processing/P5.js for providing the code for these two functions
+    The bind function allows a value between a set of two values, to be set to another set
+    For example: 0-1920 to 0-1
+    https://github.com/processing/p5.js
+    
+    Bind function (Known as map in p5.js, renamed due to naming conviction in Python):
+    https://github.com/processing/p5.js/blob/v1.4.0/src/math/calculation.js#L409
+    
+    Constrain function:
+    https://github.com/processing/p5.js/blob/v1.4.0/src/math/calculation.js#L72
+"""
+
+
+# Constrains a value between a minimum and maximum value.
+# (Comment taken from GitHub)
+def constrain(n, low, high):
+    return max(min(n, high), low)
+
+
+# Binds a number from one range to another
+# (Comment taken from GitHub)
+def bind(value, start1, stop1, start2, stop2, withinBounds):
+    new_value = (value - start1) / (stop1 - start1) * (stop2 - start2) + start2
+    if not withinBounds:
+        return new_value
+
+    if start2 < stop2:
+        return constrain(new_value, start2, stop2)
+    else:
+        return constrain(new_value, stop2, start2)
+
+
+# Checks if two positions are within distance of each other
+# Compares squared distances, so no square root is needed
+def within(pos, other, distance):
+    if distance < 0:
+        return False
+    x = pos[0] - other[0]
+    y = pos[1] - other[1]
+    return x * x + y * y <= distance * distance
+
+
+# Round a point to the nearest whole pixel, which is where every path starts and ends
+def pixel(point):
+    return math.floor(point[0] + 0.5), math.floor(point[1] + 0.5)
+
+
+# Keeps objects which are no longer used, so they can be reset and used again instead of allocated
+# Pooled classes take the same arguments in reset as in __init__
+class Pool:
+
+    # Initialize an empty pool of cls objects, keeping at most limit of them
+    def __init__(self, cls, limit=4096):
+        self.cls = cls
+        self.limit = limit
+        self.free = []
+
+    # Get an object, reusing a released one if there is one
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            return obj
+        return self.cls(*args, **kwargs)
+
+    # Give back an object which is no longer used anywhere
+    def release(self, obj):
+        if len(self.free) < self.limit:
+            self.free.append(obj)
+
+
+# Calculates a set of points along a line using Bresenham's algorithm
+class Bresenham:
+    __slots__ = ("initial", "end", "p0", "p1", "x0", "y0", "x1", "y1", "dx", "dy", "e2", "sx", "sy", "err",
+                 "length", "calls")
+
+    # Initializes Bresenham's algorithm to set variables between two points
+    def __init__(self, p0, p1):
+        self.reset(p0, p1)
+
+    # Set variables between two points, so the same object can be reused for another line
+    # The line walks whole pixels, so points between pixels are rounded to the nearest one
+    def reset(self, p0, p1):
+        p0 = pixel(p0)
+        p1 = pixel(p1)
+        self.initial = True
+        self.end = False
+        self.p0 = p0
+        self.p1 = p1
+        self.x0 = p0[0]
+        self.y0 = p0[1]
+        self.x1 = p1[0]
+        self.y1 = p1[1]
+        self.dx = abs(self.x1 - self.x0)
+        self.dy = abs(self.y1 - self.y0)
+        self.e2 = 0
+
+        if self.x0 < self.x1:
+            self.sx = 1
+        else:
+            self.sx = -1
+
+        if self.y0 < self.y1:
+            self.sy = 1
+        else:
+            self.sy = -1
+        self.err = self.dx - self.dy
+
+        # Amount of points after the starting point, and amount of get_next calls so far
+        self.length = max(self.dx, self.dy)
+        self.calls = 0
+
+    # Calculate the point which is step points along the line, without walking there
+    # The axis that changes most moves every step, and the other axis
+    # moves whenever the error would pass half a pixel
+    def point(self, step):
+        step = constrain(step, 0, self.length)
+        if self.dx >= self.dy:
+            moved_x = step
+            moved_y = (2 * step * self.dy + self.dx - 1) // (2 * self.dx) if self.dx else 0
+        else:
+            moved_x = (2 * step * self.dx + self.dy - 1) // (2 * self.dy)
+            moved_y = step
+
+        return [self.p0[0] + self.sx * moved_x, self.p0[1] + self.sy * moved_y]
+
+    # Jump straight to the point step points along the line,
+    # leaving the same state as calling get_next step + 1 times
+    def seek(self, step):
+        self.calls = step + 1
+        self.initial = False
+        self.end = step > self.length
+        self.x0, self.y0 = self.point(step)
+
+        # The error only depends on how far each axis has moved
+        moved_x = abs(self.x0 - self.p0[0])
+        moved_y = abs(self.y0 - self.p0[1])
+        self.err = self.dx - self.dy - moved_x * self.dy + moved_y * self.dx
+        return [self.x0, self.y0]
+
+    # Calculate next set of points depending on speed and error
+    # steps is how many points to move along the line at once
+    def get_next(self, steps=1):
+        self.advance(steps)
+        return [self.x0, self.y0]
+
+    # Move along the line the same way as get_next, writing the new point into pos instead of returning it
+    def advance(self, steps=1, pos=None):
+        if steps != 1:
+            self.seek(self.calls + steps - 1)
+        else:
+            self.calls += 1
+            if self.initial:
+                self.initial = False
+
+            # Finished once every point has been walked, the same as seek and MissileStore
+            elif self.calls - 1 > self.length:
+                self.end = True
+
+            else:
+                self.e2 = 2 * self.err
+                if self.e2 > -self.dy:
+                    self.err = self.err - self.dy
+                    self.x0 = self.x0 + self.sx
+                if self.e2 < self.dx:
+                    self.err = self.err + self.dx
+                    self.y0 = self.y0 + self.sy
+
+        if pos is not None:
+            pos[0] = self.x0
+            pos[1] = self.y0
+
+    # Free the path once the missile following it is gone
+    def release(self):
+        path_pool.release(self)
+
+    # Get current point
+    def get_current_pos(self):
+        return [self.x0, self.y0]
+
+    # Check if Bresenham's algorithm has finished
+    def finished(self):
+        return self.end
+
+
+# Get how far along each axis arrays of paths, dx and dy across, have moved step points along them,
+# as the arrays (moved_x, moved_y)
+# The same closed form as Bresenham.point, used by everything moving many paths at once with NumPy
+def path_offsets(dx, dy, step):
+    length = numpy.maximum(dx, dy)
+    step = numpy.minimum(step, length)
+
+    # A zero length path comes out at -1 on its minor axis, so clamp it to 0
+    minor = numpy.maximum((2 * step * numpy.minimum(dx, dy) + length - 1) // numpy.maximum(2 * length, 1), 0)
+    x_major = dx >= dy
+    return numpy.where(x_major, step, minor), numpy.where(x_major, minor, step)
+
+
+# Stores the Bresenham state of every missile in NumPy arrays,
+# so all missiles can be advanced in a single vectorized step per tick
+class MissileStore:
+
+    # Initialize empty arrays with room for capacity missiles
+    def __init__(self, capacity=64):
+        if load_numpy() is None:
+            raise ImportError("The numpy missile backend requires numpy to be installed")
+
+        self.capacity = 0
+        self.count = 0
+        self.free = []
+        self.start_x = self.start_y = self.x = self.y = self.x1 = self.y1 = None
+        self.dx = self.dy = self.sx = self.sy = self.err = self.length = None
+        self.calls = self.speed = None
+        self.initial = self.end = self.done = self.alive = None
+
+        # Copies of the positions and done flags as plain lists, which are much faster to read one at a time,
+        # and the path object for each slot
+        self.x_values = []
+        self.y_values = []
+        self.done_values = []
+        self.paths = []
+        self.grow(capacity)
+
+    # Resize every array to hold capacity missiles, keeping existing values
+    def grow(self, capacity):
+        old = self.capacity
+        for name in ("start_x", "start_y", "x", "y", "x1", "y1", "dx", "dy", "sx", "sy", "err", "length"):
+            array = numpy.zeros(capacity, dtype=numpy.float64)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        for name in ("calls", "speed"):
+            array = numpy.zeros(capacity, dtype=numpy.int64)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        for name in ("initial", "end", "done", "alive"):
+            array = numpy.zeros(capacity, dtype=bool)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        for slot in range(old, capacity):
+            self.x_values.append(0.0)
+            self.y_values.append(0.0)
+            self.done_values.append(False)
+            self.paths.append(StorePath(self, slot))
+
+        self.capacity = capacity
+
+    # Add a path between two points, returning its slot in the arrays
+    # speed is the amount of points the path moves each advance
+    def add(self, p0, p1, speed=1):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow(self.capacity * 2)
+            slot = self.count
+            self.count += 1
+
+        # Same starting state as Bresenham.__init__, on whole pixels
+        p0 = pixel(p0)
+        p1 = pixel(p1)
+        self.start_x[slot], self.start_y[slot] = p0[0], p0[1]
+        self.x[slot], self.y[slot] = p0[0], p0[1]
+        self.x1[slot], self.y1[slot] = p1[0], p1[1]
+        self.dx[slot] = abs(p1[0] - p0[0])
+        self.dy[slot] = abs(p1[1] - p0[1])
+        self.sx[slot] = 1 if p0[0] < p1[0] else -1
+        self.sy[slot] = 1 if p0[1] < p1[1] else -1
+        self.err[slot] = self.dx[slot] - self.dy[slot]
+        self.length[slot] = max(self.dx[slot], self.dy[slot])
+        self.calls[slot] = 0
+        self.speed[slot] = speed
+        self.initial[slot] = True
+        self.end[slot] = False
+        self.done[slot] = False
+        self.alive[slot] = True
+
+        self.x_values[slot] = p0[0]
+        self.y_values[slot] = p0[1]
+        self.done_values[slot] = False
+        return slot
+
+    # Get the path object which reads its state from this store
+    def path(self, p0, p1, speed=1):
+        return self.paths[self.add(p0, p1, speed)]
+
+    # Free a slot so it can be reused by another path
+    def release(self, slot):
+        self.alive[slot] = False
+        self.free.append(slot)
+
+    # Advance every live path by its speed, landing on the same points as Bresenham.get_next
+    def advance(self):
+        n = self.count
+
+        # Paths which had already ended before this tick are finished
+        self.done[:n] = self.end[:n]
+        self.done_values[:n] = self.done[:n].tolist()
+        live = numpy.flatnonzero(self.alive[:n] & ~self.end[:n])
+        if not len(live):
+            return
+
+        calls = self.calls[live] + self.speed[live]
+        self.calls[live] = calls
+        self.initial[live] = False
+
+        # Same closed form as Bresenham.point, for every live path at once
+        dx, dy = self.dx[live], self.dy[live]
+        moved_x, moved_y = path_offsets(dx, dy, calls - 1)
+
+        self.x[live] = self.start_x[live] + self.sx[live] * moved_x
+        self.y[live] = self.start_y[live] + self.sy[live] * moved_y
+        self.err[live] = dx - dy - moved_x * dy + moved_y * dx
+        self.end[live] = calls - 1 > self.length[live]
+
+        self.x_values[:n] = self.x[:n].tolist()
+        self.y_values[:n] = self.y[:n].tolist()
+
+
+# A path stored inside a MissileStore, with the same interface as Bresenham
+# The store is advanced once per tick, so get_next only reads the current point
+# Each slot keeps the same path object, so they are never allocated again
+class StorePath:
+    __slots__ = ("store", "slot")
+
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    # Get the point the store advanced this path to
+    # The store already moved the path by its speed, so steps is ignored
+    def get_next(self, steps=1):
+        return self.get_current_pos()
+
+    # Write the point the store advanced this path to into pos
+    def advance(self, steps=1, pos=None):
+        if pos is not None:
+            pos[0] = self.store.x_values[self.slot]
+            pos[1] = self.store.y_values[self.slot]
+
+    # Get current point
+    def get_current_pos(self):
+        return [self.store.x_values[self.slot], self.store.y_values[self.slot]]
+
+    # Check if the path had finished before this tick's advance
+    def finished(self):
+        return self.store.done_values[self.slot]
+
+    # Free the slot once the missile following it is gone
+    def release(self):
+        self.store.release(self.slot)
+
+
+# Phases of a tick which scheduled events run in, in the order they run
+spawn_phase = 0
+repair_phase = 1
+reload_phase = 2
+
+
+# Priority queue of events which run on a given tick, during a given phase of it
+# Nothing is polled, so events only cost anything on the tick they run
+class Scheduler:
+
+    # Initialize an empty queue
+    def __init__(self):
+        self.queue = []
+        self.order = 0
+
+    # Run callback with args during phase of tick, returning the event so it can be cancelled
+    # Events scheduled for the same tick and phase run in the order they were scheduled
+    def schedule(self, tick, phase, callback, *args):
+        event = [tick, phase, self.order, callback, args]
+        self.order += 1
+        heapq.heappush(self.queue, event)
+        return event
+
+    # Stop an event from running, it is dropped once it reaches the front of the queue
+    def cancel(self, event):
+        event[3] = None
+
+    # Run every event due by tick, up to and including phase
+    # Events of earlier ticks are due whatever their phase
+    def run(self, tick, phase):
+        queue = self.queue
+        while queue and (queue[0][0], queue[0][1]) <= (tick, phase):
+            _, _, _, callback, args = heapq.heappop(queue)
+            if callback is not None:
+                callback(*args)
+
+    # Amount of events waiting to run, including cancelled ones
+    def __len__(self):
+        return len(self.queue)
+
+
+# Stores entities in a dense list, handing out handles which stop working once the entity is despawned
+# Despawning is queued until flush, so entities can be despawned while the registry is being iterated over,
+# and flush removes each one by moving the last entity into its place
+# Stored entities get a handle and an alive attribute
+class Registry:
+
+    # Handles keep the slot in the low bits, and the slot's generation above them
+    slot_bits = 32
+    slot_mask = (1 << slot_bits) - 1
+
+    # Initialize an empty registry
+    def __init__(self):
+        self.entities = []
+        self.slots = []
+
+        # Position in entities and generation of every slot, and the slots which are free
+        self.index = []
+        self.generations = []
+        self.free = []
+
+        # Entities waiting to be removed by flush
+        self.despawned = []
+
+    # Add an entity, returning its handle
+    def spawn(self, entity):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+            self.index.append(0)
+
+        self.index[slot] = len(self.entities)
+        self.entities.append(entity)
+        self.slots.append(slot)
+
+        entity.handle = (self.generations[slot] << self.slot_bits) | slot
+        entity.alive = True
+        return entity.handle
+
+    # Get the entity a handle points to, or None if it has been despawned
+    def get(self, handle):
+        slot = handle & self.slot_mask
+        if slot < len(self.generations) and self.generations[slot] == handle >> self.slot_bits:
+            entity = self.entities[self.index[slot]]
+            if entity.alive:
+                return entity
+        return None
+
+    # Queue an entity to be removed, it is skipped by iteration straight away
+    def despawn(self, handle):
+        entity = self.get(handle)
+        if entity is not None:
+            entity.alive = False
+            self.despawned.append(entity)
+
+    # Remove every queued entity, returning them so they can be reused
+    def flush(self):
+        removed = self.despawned
+        for entity in removed:
+            slot = entity.handle & self.slot_mask
+            index = self.index[slot]
+
+            # Move the last entity into the removed entity's place
+            last = self.entities.pop()
+            last_slot = self.slots.pop()
+            if index < len(self.entities):
+                self.entities[index] = last
+                self.slots[index] = last_slot
+                self.index[last_slot] = index
+
+            # Old handles to this slot stop working
+            self.generations[slot] += 1
+            self.free.append(slot)
+
+        self.despawned = []
+        return removed
+
+    # Iterate over every entity which hasn't been despawned,
+    # including entities spawned during iteration
+    def __iter__(self):
+        for entity in self.entities:
+            if entity.alive:
+                yield entity
+
+    # Amount of entities which haven't been despawned
+    def __len__(self):
+        return len(self.entities) - len(self.despawned)
+
+
+# Uniform grid which buckets objects by position,
+# so range checks only need to look at objects in nearby cells
+class SpatialHash:
+
+    # Initialize an empty grid, with square cells of cell_size pixels
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+
+    # Get the cell a position falls into
+    def cell(self, pos):
+        return int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)
+
+    # Empty the grid and insert every object in objects at its current position
+    # Objects are returned by query in the same order as they appear in objects
+    def build(self, objects):
+        self.cells.clear()
+        self.entries.clear()
+        for order, obj in enumerate(objects):
+            key = self.cell(obj.pos)
+            entry = (order, obj)
+            self.cells.setdefault(key, []).append(entry)
+            self.entries[obj] = (key, entry)
+
+    # Remove an object from the grid, if it is in it
+    def discard(self, obj):
+        found = self.entries.pop(obj, None)
+        if found is not None:
+            key, entry = found
+            self.cells[key].remove(entry)
+
+    # Get every object in the cells touching the square around pos, in insertion order
+    # This is only a broad phase, objects still need an exact range check
+    def query(self, pos, distance):
+        if distance < 0:
+            return []
+
+        left, top = self.cell((pos[0] - distance, pos[1] - distance))
+        right, bottom = self.cell((pos[0] + distance, pos[1] + distance))
+
+        found = []
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self.cells.get((x, y))
+                if cell:
+                    found.extend(cell)
+
+        found.sort(key=lambda entry: entry[0])
+        return [obj for _, obj in found]
+
+
+# Keeps objects sorted along the x axis, for finding the one nearest to a point
+# Objects are added while they can be targeted and removed while they can't, like cities while destroyed
+class NearestIndex:
+
+    # Initialize the index holding every object in objects, point gets the position of an object
+    # Objects closer than any other in the same way are picked in the order they are in objects
+    def __init__(self, objects, point):
+        self.point = point
+        self.order = {obj: order for order, obj in enumerate(objects)}
+
+        # Sorted (x, order) of every object in the index, and the objects in the same order
+        self.keys = []
+        self.objects = []
+        for obj in objects:
+            self.add(obj)
+
+    # Get the key an object is sorted by
+    def key(self, obj):
+        return self.point(obj)[0], self.order[obj]
+
+    # Add an object, if it isn't in the index already
+    def add(self, obj):
+        key = self.key(obj)
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            self.keys.insert(index, key)
+            self.objects.insert(index, obj)
+
+    # Remove an object, if it is in the index
+    def discard(self, obj):
+        key = self.key(obj)
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+            del self.objects[index]
+
+    # Get the object nearest to pos, or None if the index is empty
+    # Searches outwards from pos along the x axis, until objects are further away on x alone than the nearest
+    def nearest(self, pos):
+        keys = self.keys
+        start = bisect.bisect_left(keys, (pos[0],))
+
+        nearest = None
+        smallest_distance = math.inf
+        smallest_order = 0
+        for indices in (range(start, len(keys)), range(start - 1, -1, -1)):
+            for index in indices:
+                x, order = keys[index]
+                if abs(x - pos[0]) > smallest_distance:
+                    break
+
+                obj = self.objects[index]
+                distance = math.hypot(x - pos[0], self.point(obj)[1] - pos[1])
+                if distance < smallest_distance or (distance == smallest_distance and order < smallest_order):
+                    nearest = obj
+                    smallest_distance = distance
+                    smallest_order = order
+        return nearest
+
+    # Checks if an object is in the index
+    def __contains__(self, obj):
+        key = self.key(obj)
+        index = bisect.bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+    # Amount of objects in the index
+    def __len__(self):
+        return len(self.keys)
+
+
+# Keeps pre-rendered circles, so drawing a circle is a single blit
+# Circles are rendered the first time each radius and colour is asked for,
+# and the least recently used ones are dropped once there are more than limit
+class SpriteCache:
+
+    # Colour used for the see-through parts of each sprite
+    transparent = (255, 0, 255)
+
+    # Initialize an empty cache
+    def __init__(self, limit=256):
+        self.limit = limit
+        self.sprites = OrderedDict()
+
+    # Get the sprite for a circle, rendering it if it isn't cached
+    def sprite(self, colour, radius):
+        key = (colour, radius)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        # The sprite has a pixel of padding so the circle is never clipped
+        size = radius * 2 + 2
+        sprite = pygame.Surface((size, size))
+        sprite.fill(self.transparent)
+        pygame.draw.circle(sprite, colour, (radius + 1, radius + 1), radius, 0)
+
+        # Match the display's pixel format when there is one, so blitting doesn't need converting
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()
+        sprite.set_colorkey(self.transparent, pygame.RLEACCEL)
+
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.limit:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    # Render every radius in radii ahead of time
+    def preload(self, colour, radii):
+        for radius in radii:
+            self.sprite(colour, radius)
+
+    # Draw a filled circle onto surface, returning the area drawn over
+    def circle(self, surface, colour, center, radius):
+        return surface.blit(self.sprite(colour, radius), (center[0] - radius - 1, center[1] - radius - 1))
+
+
+# Shared cache used when drawing explosions, missiles and ammunition
+sprites = SpriteCache()
+
+
+class Explosion:
+    __slots__ = ("pos", "radius", "prev_radius", "increasing", "maxRadius", "causedByPlayer", "speed", "handle",
+                 "alive")
+
+    # Initialize an explosion, rng is the random number generator used for the starting radius
+    def __init__(self, pos, max_radius, missile, rng=random):
+        self.pos = [0, 0]
+        self.reset(pos, max_radius, missile, rng)
+
+    # Set up the explosion again, so the same object can be reused
+    # The position is copied, as the missile it came from may be reused as well
+    def reset(self, pos, max_radius, missile, rng=random):
+        self.pos[0] = pos[0]
+        self.pos[1] = pos[1]
+        self.radius = rng.randrange(1, 10)
+        self.prev_radius = self.radius
+        self.increasing = True
+        self.maxRadius = max_radius
+        self.causedByPlayer = missile.isPlayer
+        self.speed = 0.5
+        self.handle = None
+        self.alive = True
+
+    # Area of the explosion when it started
+    @property
+    def rect(self):
+        return pygame.Rect(self.pos[0], self.pos[1], self.radius, self.radius)
+
+    # Get the radius alpha of the way from the previous tick to the current one
+    def radius_at(self, alpha=1):
+        if alpha >= 1:
+            return self.radius
+        return self.prev_radius + (self.radius - self.prev_radius) * alpha
+
+    # Draw the explosion onto surface, returning the area drawn over
+    # alpha is how far between the previous tick and the current one to draw it
+    def draw(self, surface, alpha=1):
+        # Checks if the explosion's radius is bigger than 0.
+        # If so, draw a circle at its position with size of radius
+        radius = self.radius_at(alpha)
+        if radius > 0:
+            return sprites.circle(surface, (255, 255, 255), (int(self.pos[0]), int(self.pos[1])), int(radius))
+        return None
+
+    # Checks any other object is in range of the explosion.
+    def in_range(self, other):
+        if other is not self:
+            return within(self.pos, other.pos, self.radius * 2)
+
+    # Checks if any other object is in range of the max radius limit of the explosion
+    def in_max_range(self, other):
+        return within(self.pos, other.pos, self.maxRadius * 2)
+
+    # Update the explosion
+    def update(self, engine):
+        self.prev_radius = self.radius
+
+        # Checks if the radius has surpassed the maximum radius for the explosion
+        # If so, set increasing to false
+        if self.radius >= self.maxRadius:
+            self.increasing = False
+
+        # Checks if the radius is less than 0, if so, remove explosions from explosions list
+        elif self.radius < 0:
+            engine.explosions.despawn(self.handle)
+
+        # Checks if it's increasing, if so, increase radius, if not, decrease radius
+        if self.increasing:
+            self.radius += 1 * self.speed
+        else:
+            self.radius -= 1 * self.speed
+
+    # Free the explosion once it is gone
+    def release(self):
+        explosion_pool.release(self)
+
+
+class Missile:
+    __slots__ = ("pos", "prev_pos", "target", "x", "y", "radius", "path", "start_position", "isPlayer", "speed",
+                 "handle", "alive")
+
+    # Initialize missile, path defaults to Bresenham's algorithm between start and destination
+    # speed is the amount of points the missile moves along its path each update
+    def __init__(self, start, destination, radius=10, is_player=False, path=None, speed=1):
+        # The position is updated in place, so it is the missile's own list, as is the position before the update
+        self.pos = [0, 0]
+        self.prev_pos = [0, 0]
+        self.reset(start, destination, radius, is_player, path, speed)
+
+    # Set up the missile again, so the same object can be reused
+    def reset(self, start, destination, radius=10, is_player=False, path=None, speed=1):
+        self.pos[0] = self.prev_pos[0] = start[0]
+        self.pos[1] = self.prev_pos[1] = start[1]
+        self.target = destination
+        self.x = self.pos[0]
+        self.y = self.pos[1]
+        self.radius = radius
+        self.path = path if path is not None else path_pool.acquire(start, destination)
+        self.start_position = start
+        self.isPlayer = is_player
+        self.speed = speed
+        self.handle = None
+        self.alive = True
+
+    # Area covered by the missile at its current position
+    @property
+    def rect(self):
+        return pygame.Rect(self.pos[0], self.pos[1], self.radius, self.radius)
+
+    # Create explosion when explode is called
+    def explode(self, engine):
+        engine.createExplosion(self.pos, engine.explosion_radius, self)
+
+    # Checks if this object is colliding with another object
+    def collide(self, other):
+        if other is not self:
+            return self.rect.contains(other.rect) or self.rect.colliderect(other.rect)
+
+    # Checks if this object is in within a threshold range of another object
+    def in_range(self, other, threshold):
+        if self is not other:
+            return within(self.pos, other.pos, self.reach(threshold))
+
+    # Distance at which in_range detects another object
+    def reach(self, threshold):
+        return (self.radius + threshold) * 2
+
+    # Get the pixel alpha of the way from the position last tick to the current one
+    def position(self, alpha=1):
+        if alpha >= 1:
+            return int(self.pos[0]), int(self.pos[1])
+        return (int(self.prev_pos[0] + (self.pos[0] - self.prev_pos[0]) * alpha),
+                int(self.prev_pos[1] + (self.pos[1] - self.prev_pos[1]) * alpha))
+
+    # Get the end of the trail behind the missile at pos, which is trail_length pixels long,
+    # or reaches back to where the missile started if trail_length is None
+    def trail_end(self, pos, trail_length=None):
+        start = self.start_position
+        if trail_length is None:
+            return start
+
+        distance = math.hypot(start[0] - pos[0], start[1] - pos[1])
+        if distance <= trail_length:
+            return start
+        return (pos[0] + (start[0] - pos[0]) * trail_length / distance,
+                pos[1] + (start[1] - pos[1]) * trail_length / distance)
+
+    # Draw the missile onto surface, returning the area drawn over
+    # alpha is how far between the previous tick and the current one to draw it, trail_length is passed to trail_end
+    def draw(self, surface, alpha=1, trail_length=None):
+        pos = self.position(alpha)
+        head = sprites.circle(surface, (255, 255, 255), pos, self.radius)
+        trail = pygame.draw.line(surface, (255, 255, 255), pos, self.trail_end(pos, trail_length))
+        return head.union(trail)
+
+    # Update the missile
+    # Returns True if the missile exploded and was removed from its list
+    def update(self, engine):
+        # Checks if the missile has gone through all points in Bresenham's algorithm
+        # If not, set current position to the next point in Bresenham's algorithm
+        # If so, explode the missile, and remove the missile from its list
+        if not self.path.finished():
+            self.prev_pos[0] = self.pos[0]
+            self.prev_pos[1] = self.pos[1]
+            self.path.advance(self.speed, self.pos)
+            return False
+
+        self.explode(engine)
+        engine.removeMissile(self)
+        return True
+
+    # Free the missile and its path once it is gone
+    def release(self):
+        self.path.release()
+        self.path = None
+        missile_pool.release(self)
+
+
+# Pools of objects which are created and removed all the time
+path_pool = Pool(Bresenham)
+missile_pool = Pool(Missile)
+explosion_pool = Pool(Explosion)
+
+
+class Silo:
+    global screen
+
+    # Initialize class into an instance, reload is the time between reloads in milliseconds
+    def __init__(self, pos, w, reload=reload_delay):
+        self.pos = pos
+        self.missiles = 6
+        self.width = w
+        self.height = w / 4
+        self.x = pos[0]
+        self.y = pos[1]
+        self.mound_vertices = [(self.x, self.y), (self.x + self.width, self.y),
+                               (self.x + self.width - (self.width / 4), self.y - self.height),
+                               (self.x + (self.width / 4), self.y - self.height)]
+
+        self.silo_rect = pygame.Rect(self.x + self.height, self.y - self.height - 4,
+                                     self.width - (self.height + self.height), height - self.height)
+        self.launchPosition = [self.x + (self.width / 2), self.y - self.height]
+        self.reload_time = 0
+        self.reload_delay = reload
+
+        # Scheduled reload, or None when the silo is full
+        self.reload_event = None
+        self.max_missiles = 6
+        self.ammo_radius = 4
+
+    # Get position where missiles should launch from
+    def getLaunchPosition(self):
+        return self.launchPosition
+
+    # Reload a single missile once the reload delay has passed since the last launch
+    # Returns True if the silo still isn't full
+    def reload(self):
+        if self.missiles < self.max_missiles:
+            self.missiles += 1
+        return self.missiles < self.max_missiles
+
+    # Get the position of an ammunition pellet
+    def ammo_position(self, ammo):
+        return (int(self.x + (self.height + ((self.ammo_radius * 2) + self.ammo_radius / 2) * ammo)
+                    + self.ammo_radius * 1.5),
+                int(self.y + self.height / 2))
+
+    # Get the area covered by a full row of ammunition pellets
+    def ammo_area(self):
+        first = self.ammo_position(0)
+        last = self.ammo_position(self.max_missiles - 1)
+        return pygame.Rect(first[0] - self.ammo_radius, first[1] - self.ammo_radius,
+                           last[0] - first[0] + self.ammo_radius * 2 + 1, self.ammo_radius * 2 + 1)
+
+    # Draw the mound and the silo itself, which never change
+    def draw_mound(self, surface):
+        pygame.draw.polygon(surface, (0, 255, 0), self.mound_vertices)
+        pygame.draw.rect(surface, (64, 64, 64), self.silo_rect)
+
+    # Draw ammunition pellets in the middle of the silo, depending on how many missiles the silos have
+    def draw_ammo(self, surface):
+        for ammo in range(self.missiles):
+            sprites.circle(surface, (255, 255, 255), self.ammo_position(ammo), int(self.ammo_radius))
+
+    # Draw the silo onto surface
+    def draw(self, surface):
+        self.draw_mound(surface)
+        self.draw_ammo(surface)
+
+
+class City:
+    global screen
+
+    # Initialize city, rng is the random number generator used for buildings and damage
+    # repair is how long a repair takes in milliseconds
+    def __init__(self, pos, city_width, rng=random, repair=repair_delay):
+        self.pos = pos
+        self.width = city_width
+        self.destroyed = False
+        self.random = rng
+        self.repair_delay = repair
+        self.center = [self.pos[0] + (self.width / 2), self.pos[1] - (int(self.width / 2) / 2)]
+
+        # Limit the building count
+        self.building_count = 6
+
+        # Pixel difference per building
+        self.building_buffer = 6
+
+        # Calculate area which should cause the city to be affected by missiles
+        self.area = [self.width + (self.building_buffer * self.building_count), (self.width / 3)]
+        self.rect = pygame.Rect(self.pos[0], self.pos[1] - int(self.width / 2),
+                                self.width + (self.building_buffer * self.building_count), int(self.width / 2))
+
+        # Rect, colour and destroyed rect of every building
+        self.buildings = []
+        self.building_colours = []
+        self.destroyed_rects = []
+
+        # Create the building, and calculate where to place them
+        for building in range(self.building_count):
+            building_width = (self.width / self.building_count)
+            building_height = self.random.randrange(int(self.width / 6), int(self.width / 2))
+            building_pos = [self.pos[0] + (self.building_buffer * building) + (building_width * building),
+                            self.pos[1] - building_height]
+
+            rect = pygame.Rect(building_pos, (building_width, building_height))
+            colour_one = self.random.randrange(15, 63)
+            colour = (colour_one, colour_one, colour_one)
+
+            # What is left standing once the building is destroyed
+            destroyed_height = int(rect.height / 4)
+            destroyed_rect = pygame.Rect(rect.left, rect.top + rect.height - destroyed_height, rect.w, destroyed_height)
+
+            self.buildings.append(rect)
+            self.building_colours.append(colour)
+            self.destroyed_rects.append(destroyed_rect)
+
+        # Whether each building is destroyed, and how many are
+        self.building_destroyed = bytearray(self.building_count)
+        self.destroyed_buildings = 0
+
+        # Increased every time the buildings change, so cached drawings know to redraw
+        self.version = 0
+
+        self.repairing = False
+        self.repair_start = 0
+        self.repair_progress = 0
+        self.repair_progress_width = 0
+        self.repair_rect = pygame.Rect(self.pos[0],
+                                       self.pos[1] - int(self.width / 2) - 32,
+                                       0,
+                                       16)
+
+    # Cause damage to the city
+    # Returns True if this damage destroyed the city
+    def damage(self):
+        # Checks if the city is not destroyed
+        if not self.destroyed:
+            # Checks if all buildings in a city is destroyed
+            # If so, declare the city to be destroyed
+            # If not, pick a random building, and destroy it
+            if self.destroyed_buildings == self.building_count:
+                self.destroyed = True
+                self.version += 1
+                return True
+            else:
+                rand_index = self.random.randrange(self.building_count)
+
+                if not self.building_destroyed[rand_index]:
+                    self.building_destroyed[rand_index] = True
+                    self.destroyed_buildings += 1
+                    self.version += 1
+        return False
+
+    # Repair city, starting from the current simulation time in milliseconds
+    def repair(self, now):
+        self.repair_start = now
+        self.repairing = True
+
+    # Draw every building in the buildings list onto surface
+    def draw_buildings(self, surface):
+        # If the building is destroyed, draw it with its colour,
+        # If not, draw it with a light grey
+        for building in range(self.building_count):
+            if not self.building_destroyed[building]:
+                pygame.draw.rect(surface, self.building_colours[building], self.buildings[building])
+            else:
+                pygame.draw.rect(surface, (79, 79, 79), self.destroyed_rects[building])
+
+    # Draw the repair progress onto surface, returning the area drawn over
+    def draw_repair(self, surface):
+        # Only show the repair progress if the city is being repaired
+        if self.repairing:
+            return pygame.draw.rect(surface, (255, 255, 255), self.repair_rect)
+        return None
+
+    # Draw the city onto surface
+    def draw(self, surface):
+        self.draw_buildings(surface)
+        self.draw_repair(surface)
+
+    # Update the city, now is the current simulation time in milliseconds
+    def update(self, now):
+
+        # Checks if the city is being repaired
+        if self.repairing:
+
+            # Calculate the width of the rect based on the progress of the repair
+            self.repair_progress = now - self.repair_start
+            self.repair_rect.width = bind(self.repair_progress, 0, self.repair_delay, 0,
+                                          self.width + (self.building_buffer * self.building_count), True)
+
+    # Reset the state of the city once the repair has taken the repair delay
+    def finish_repair(self):
+        self.repairing = False
+        self.destroyed = False
+        self.version += 1
+        self.building_destroyed = bytearray(self.building_count)
+        self.destroyed_buildings = 0
+
+
+# Ground surface, as a rect style tuple
+ground = (0, ground_height, width, height)
+
+
+# Change the size of the game area, before the window is opened and any engine is created
+def resize(new_width, new_height):
+    global width, height, ground_height, ground
+    width, height = new_width, new_height
+    ground_height = height - 32
+    ground = (0, ground_height, width, height)
+
+
+# Smallest widths a city and a silo can be drawn at, with buildings and a silo still visible
+min_city_width = 12
+min_silo_width = 16
+
+
+# Round a width down to a multiple of 4 pixels, so the centres and launch positions worked out from it are whole
+def layout_width(value):
+    return int(value // 4 * 4)
+
+
+# Get where cities and silos go along the ground, as lists of (position, width) for each
+# Three cities and two silos keep the original layout, any other amount is spread evenly over the width,
+# alternating between cities and silos as much as possible
+# Positions and widths are whole pixels, as the missile paths between them walk whole pixels
+def layout(city_count=3, silo_count=2):
+    if (city_count, silo_count) == (3, 2):
+        city_width = layout_width(width / 8)
+        cities = [([32, ground_height], city_width),
+                  ([width // 2 - city_width // 2 - 32, ground_height], city_width),
+                  ([width - city_width - 64, ground_height], city_width)]
+        silos = [((city_width + 96, ground_height), 128),
+                 ((width // 2 - city_width // 2 + city_width + 64, ground_height), 128)]
+        return cities, silos
+
+    # Every city and silo gets an equal slot of the width, a city also needing room for the gaps between buildings
+    count = city_count + silo_count
+    slot = width / count if count else width
+    if slot < min_city_width + 36 or slot < min_silo_width:
+        raise ValueError("%d cities and %d silos don't fit in a width of %d pixels, as each needs at least %d"
+                         % (city_count, silo_count, width, min_city_width + 36))
+    city_width = max(min_city_width, layout_width(min(width / 8, slot * 0.75 - 36)))
+    silo_width = max(min_silo_width, layout_width(min(128, slot * 0.75)))
+
+    # A slot holds a silo whenever the rounded share of silos so far goes up
+    cities = []
+    silos = []
+    for index in range(count):
+        left = slot * index
+        if int((index + 1) * silo_count / count + 0.5) > int(index * silo_count / count + 0.5):
+            silos.append(((int(left + (slot - silo_width) / 2), ground_height), silo_width))
+        else:
+            cities.append(([int(left + (slot - city_width - 36) / 2), ground_height], city_width))
+    return cities, silos
+
+
+# Times each phase of every frame, keeping the most recent frames for rolling percentiles
+# Phases are timed from one mark to the next, starting at begin_frame
+class FrameProfiler:
+
+    # Initialize the profiler, keeping the last window frames
+    # If csv_path is given, the timings of every frame are also written there
+    def __init__(self, window=300, csv_path=None):
+        self.window = window
+        self.phases = OrderedDict()
+        self.frame = 0
+        self.current = {}
+        self.last = 0
+
+        self.visible = False
+        self.font = None
+        self.hud = None
+
+        self.csv_file = None
+        self.csv_writer = None
+        self.csv_phases = None
+        if csv_path is not None:
+            self.csv_file = open(csv_path, "w", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+
+    # Start timing a frame
+    def begin_frame(self):
+        self.current = {}
+        self.last = time.perf_counter()
+
+    # Finish timing the phase which has been running since the last mark
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0) + (now - self.last) * 1000
+        self.last = now
+
+    # Finish timing a frame, keeping its timings and writing them to the csv file
+    def end_frame(self):
+        self.current["frame"] = sum(self.current.values())
+        for phase, duration in self.current.items():
+            if phase not in self.phases:
+                self.phases[phase] = deque(maxlen=self.window)
+            self.phases[phase].append(duration)
+
+        if self.csv_writer is not None:
+            # The columns are fixed by the phases seen in the first frame
+            if self.csv_phases is None:
+                self.csv_phases = list(self.current)
+                self.csv_writer.writerow(["frame"] + ["%s_ms" % phase for phase in self.csv_phases])
+            self.csv_writer.writerow([self.frame] + ["%.4f" % self.current.get(phase, 0)
+                                                     for phase in self.csv_phases])
+        self.frame += 1
+
+    # Get the 50th, 95th and 99th percentile of a phase's duration, in milliseconds
+    def percentiles(self, phase):
+        durations = sorted(self.phases[phase])
+        last = len(durations) - 1
+        return tuple(durations[int(last * percent / 100)] for percent in (50, 95, 99))
+
+    # Show or hide the overlay
+    def toggle(self):
+        self.visible = not self.visible
+        self.hud = None
+
+    # Draw the overlay onto surface, returning the area drawn over
+    # The text is only rendered again every half a second of frames, so reading it isn't a blur
+    def draw(self, surface, every=30):
+        if not self.visible or not self.phases:
+            return None
+
+        if self.hud is None or self.frame % every == 0:
+            if self.font is None:
+                pygame.font.init()
+                self.font = pygame.font.SysFont("monospace", 15)
+
+            lines = ["%-16s %7s %7s %7s" % ("phase (ms)", "p50", "p95", "p99")]
+            for phase in self.phases:
+                lines.append("%-16s %7.3f %7.3f %7.3f" % ((phase,) + self.percentiles(phase)))
+
+            rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+            line_height = self.font.get_linesize()
+            self.hud = pygame.Surface((max(text.get_width() for text in rendered) + 16,
+                                       line_height * len(rendered) + 16))
+            self.hud.fill((0, 0, 0))
+            for index, text in enumerate(rendered):
+                self.hud.blit(text, (8, 8 + index * line_height))
+
+        return surface.blit(self.hud, (8, 8))
+
+    # Stop writing to the csv file
+    def close(self):
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+
+
+# Picks the detail level a Renderer draws at, from how long recent frames took against the time each frame has
+# Drops a level as soon as a window of frames averages over budget, but only goes back up a level
+# once frames have stayed well under budget for a while, so it doesn't flicker between levels
+class FrameGovernor:
+
+    # Initialize the governor for frames which have budget milliseconds each
+    # high and low are the fractions of the budget frames have to average over to drop a level,
+    # and under for recover frames in a row to go back up one
+    def __init__(self, budget, window=15, high=0.9, low=0.5, recover=120):
+        self.budget = budget
+        self.times = deque(maxlen=window)
+        self.high = high
+        self.low = low
+        self.recover = recover
+        self.calm = 0
+        self.level = detail_full
+
+    # Add how many milliseconds a frame took, not counting the time spent waiting for the next one
+    def add_frame(self, duration):
+        self.times.append(duration)
+        if len(self.times) < self.times.maxlen:
+            return
+
+        # Every level is timed on frames drawn at that level alone
+        average = sum(self.times) / len(self.times)
+        if average > self.budget * self.high:
+            self.calm = 0
+            if self.level < detail_lazy_hud:
+                self.level += 1
+                self.times.clear()
+        elif average < self.budget * self.low:
+            self.calm += 1
+            if self.calm >= self.recover and self.level > detail_full:
+                self.level -= 1
+                self.calm = 0
+                self.times.clear()
+        else:
+            self.calm = 0
+
+
+# Headless game simulation
+# Owns every entity and advances the game one fixed tick at a time,
+# without drawing anything or waiting on the wall clock
+class Engine:
+
+    # Initialize the game state
+    # backend is either "python" for a Bresenham object per missile,
+    # or "numpy" to advance every missile at once through a MissileStore
+    # seed makes every random choice in the game repeatable, the rest override the gameplay settings
+    def __init__(self, rate=tick_rate, backend="python", seed=None, max_missiles=max_attack_missiles,
+                 spawn_delay=spawn_delay, reload_delay=reload_delay, repair_delay=repair_delay,
+                 explosion_radius=explosion_radius, cities=3, silos=2):
+        self.tick_rate = rate
+        self.store = MissileStore() if backend == "numpy" else None
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.max_missiles = max_missiles
+        self.spawn_delay = spawn_delay
+        self.explosion_radius = explosion_radius
+
+        # Amount of ticks simulated, and the simulated time in milliseconds
+        self.tick = 0
+        self.now = 0
+        self.last_spawn = 0
+
+        # Counters kept for statistics
+        self.missiles_spawned = 0
+        self.missiles_fired = 0
+        self.missiles_intercepted = 0
+        self.cities_lost = 0
+
+        # List of cities and silos, placed depending on screen size
+        city_layout, silo_layout = layout(cities, silos)
+        self.cities = [City(pos, city_width, self.random, repair_delay) for pos, city_width in city_layout]
+        self.silos = [Silo(pos, silo_width, reload_delay) for pos, silo_width in silo_layout]
+
+        # Cities which aren't destroyed and silos with ammunition, for finding the nearest one
+        self.city_index = NearestIndex(self.cities, lambda city: city.center)
+        self.silo_index = NearestIndex(self.silos, lambda silo: silo.launchPosition)
+
+        # Defines registries for attack missiles, player missiles and explosions
+        self.attack_missiles = Registry()
+        self.player_missiles = Registry()
+        self.explosions = Registry()
+
+        # Broad phase grid of attack missiles, rebuilt every tick
+        self.grid = SpatialHash()
+
+        # Amount of points missiles move along their path each tick
+        self.player_speed = 1
+        self.attack_speed = 1
+
+        # FrameProfiler timing each phase of step, or None when not profiling
+        self.profiler = None
+
+        # Telemetry recording the state after every tick, or None when not recording it
+        self.telemetry = None
+
+        # Spawns, reloads and repair completions waiting for their tick, and the cities being repaired
+        self.scheduler = Scheduler()
+        self.repairing = []
+
+        # Set when a spawn was due but couldn't happen, until something which might allow it changes
+        self.spawn_waiting = False
+        self.scheduler.schedule(self.at(self.spawn_delay), spawn_phase, self.spawnAttackMissile)
+
+    # Get the first tick at or after a simulation time in milliseconds
+    def at(self, time):
+        return -(-time * self.tick_rate // 1000)
+
+    # Create an explosion
+    def createExplosion(self, pos, radius, parent):
+        # Add to explosions list with parameters
+        explosion = explosion_pool.acquire(pos, radius, parent, self.random)
+        self.explosions.spawn(explosion)
+
+        # Explosions don't move and their max range never changes,
+        # so the cities an attack explosion reaches can be damaged as soon as it starts
+        if not explosion.causedByPlayer:
+            self.damageCities(explosion)
+
+    # Damage every city within the max range of an explosion
+    # This only runs once, as the explosion is created, so each city is damaged at most once per explosion
+    def damageCities(self, explosion):
+        for city in self.cities:
+            if explosion.in_max_range(city) and city.damage():
+                self.cities_lost += 1
+                self.city_index.discard(city)
+
+    # Create the path a missile follows between two points, which have to be whole pixels
+    def createPath(self, start, end, speed):
+        if start[0] % 1 or start[1] % 1 or end[0] % 1 or end[1] % 1:
+            raise ValueError("Missile paths run between whole pixels, not from %r to %r" % (start, end))
+        if self.store is not None:
+            return self.store.path(start, end, speed)
+        return path_pool.acquire(start, end)
+
+    # Despawn a missile, it is removed from its registry and freed once the tick is over
+    def removeMissile(self, missile):
+        if missile.isPlayer:
+            self.player_missiles.despawn(missile.handle)
+        else:
+            self.attack_missiles.despawn(missile.handle)
+            self.grid.discard(missile)
+
+    # Create a missile, created by the player, aimed at pos
+    def createPlayerMissile(self, pos):
+        # Calculate closest silo with ammunition, depending on the aimed position
+        closest_silo = self.silo_index.nearest(pos)
+
+        # Checks if there's a silo nearby
+        if closest_silo is not None:
+            # Added missile to player missiles list, remove a missile and set reload time
+            path = self.createPath(closest_silo.launchPosition, pos, self.player_speed)
+            self.player_missiles.spawn(missile_pool.acquire(closest_silo.launchPosition, pos, is_player=True,
+                                                            path=path, speed=self.player_speed))
+            closest_silo.missiles -= 1
+            closest_silo.reload_time = self.now
+            self.missiles_fired += 1
+            if closest_silo.missiles == 0:
+                self.silo_index.discard(closest_silo)
+
+            # Launching restarts the reload delay
+            if closest_silo.reload_event is not None:
+                self.scheduler.cancel(closest_silo.reload_event)
+            closest_silo.reload_event = self.scheduler.schedule(self.at(self.now + closest_silo.reload_delay),
+                                                                reload_phase, self.reloadSilo, closest_silo)
+
+    # Reload a silo, then keep reloading it every tick until it is full
+    def reloadSilo(self, silo):
+        reloading = silo.reload()
+        self.silo_index.add(silo)
+        if reloading:
+            silo.reload_event = self.scheduler.schedule(self.tick + 1, reload_phase, self.reloadSilo, silo)
+        else:
+            silo.reload_event = None
+
+    # Spawn an attack missile once the spawn delay has passed
+    # If there are already max_missiles or every city is destroyed, wait until that changes
+    def spawnAttackMissile(self):
+        if self.game_over() or len(self.attack_missiles) >= self.max_missiles:
+            self.spawn_waiting = True
+            return
+
+        # The next spawn is never before next tick, so a spawn delay shorter than a tick still spawns once a tick
+        self.createAttackMissile()
+        self.scheduler.schedule(max(self.at(self.now + self.spawn_delay), self.tick + 1), spawn_phase,
+                                self.spawnAttackMissile)
+
+    # Try a spawn which was waiting again next tick
+    def wakeSpawn(self):
+        if self.spawn_waiting:
+            self.spawn_waiting = False
+            self.scheduler.schedule(self.tick + 1, spawn_phase, self.spawnAttackMissile)
+
+    # Create a missile, created by the attacker / computer
+    def createAttackMissile(self):
+        # Picks a random value between 0 and width of the window
+        start_x = self.random.randint(0, width)
+        start_y = ground_height - height
+        start = [start_x, start_y]
+
+        # Calculates the closest city which isn't destroyed, depending on starting position
+        closest_city = self.city_index.nearest(start)
+
+        # If there is no city nearby, set the target x to be random value between 0 and width of the window
+        # If there is a city nearby, set the target x to be the center of the city
+        if closest_city is None:
+            end_x = self.random.randint(0, width)
+        else:
+            end_x = closest_city.center[0]
+
+        end = [end_x, ground_height]
+
+        path = self.createPath(start, end, self.attack_speed)
+        self.attack_missiles.spawn(missile_pool.acquire(start, end, path=path, speed=self.attack_speed))
+        self.last_spawn = self.now
+        self.missiles_spawned += 1
+
+    # Checks if every city is destroyed
+    def game_over(self):
+        return not self.city_index
+
+    # Repair any destroyed city under pos
+    def repairCity(self, pos):
+        for city in self.cities:
+            if city.rect.collidepoint(pos) and city.destroyed and not city.repairing:
+                city.repair(self.now)
+                self.repairing.append(city)
+                self.scheduler.schedule(self.at(self.now + city.repair_delay), repair_phase, self.finishRepair, city)
+
+    # Finish repairing a city, which may let a waiting spawn happen
+    def finishRepair(self, city):
+        city.update(self.now)
+        city.finish_repair()
+        self.city_index.add(city)
+        self.repairing.remove(city)
+        self.wakeSpawn()
+
+    # Advance the game by a single tick
+    # inputs is a list of (button, pos) mouse clicks which happened since the last tick
+    def step(self, inputs=()):
+        profiler = self.profiler
+
+        # Create any attack missile which is due
+        # If every city is destroyed, explode all attack missiles
+        self.scheduler.run(self.tick, spawn_phase)
+        if self.game_over():
+            for attack in self.attack_missiles:
+                attack.explode(self)
+
+        if profiler is not None:
+            profiler.mark("spawn")
+
+        for button, pos in inputs:
+            # Checks if the user has clicked with the left mouse button
+            # If so, create a player missile
+            if button == LEFT_MOUSE_BUTTON:
+                self.createPlayerMissile(pos)
+
+            # Checks if the user has clicked with the right mouse button
+            # If so, repair the city under the cursor if it is destroyed
+            if button == RIGHT_MOUSE_BUTTON:
+                self.repairCity(pos)
+
+        if profiler is not None:
+            profiler.mark("input")
+
+        # Finish any repairs which are due, then update the progress of the rest
+        self.scheduler.run(self.tick, repair_phase)
+        for city in self.repairing:
+            city.update(self.now)
+
+        if profiler is not None:
+            profiler.mark("cities")
+
+        # Advance every stored missile path at once
+        if self.store is not None:
+            self.store.advance()
+
+        # Bucket attack missiles so collisions only check nearby missiles
+        self.grid.build(self.attack_missiles)
+
+        # Update all player missiles
+        for missile in self.player_missiles:
+            # Skip collisions for missiles which have just reached their destination
+            if missile.update(self):
+                continue
+
+            # Check if any attack and player missiles collide
+            # If so, explode them and remove them of their
+            # respective lists
+            for attack in self.grid.query(missile.pos, missile.reach(-5)):
+                if missile.in_range(attack, -5):
+                    missile.explode(self)
+                    attack.explode(self)
+                    self.removeMissile(missile)
+                    self.removeMissile(attack)
+                    self.missiles_intercepted += 1
+                    break
+
+        if profiler is not None:
+            profiler.mark("player_missiles")
+
+        # Update all attack missiles
+        for missile in self.attack_missiles:
+            missile.update(self)
+
+        # Attack missiles have moved, so bucket them again
+        self.grid.build(self.attack_missiles)
+
+        if profiler is not None:
+            profiler.mark("attack_missiles")
+
+        # Update all explosions, cities were already damaged when they started
+        for explosion in self.explosions:
+            explosion.update(self)
+
+            # Checks if the explosion is in range of an attack missile
+            # If so, explode the missile and remove it from attack missiles list
+            for attack in self.grid.query(explosion.pos, explosion.radius * 2):
+                if explosion.in_range(attack):
+                    attack.explode(self)
+                    self.removeMissile(attack)
+                    self.missiles_intercepted += 1
+
+        if profiler is not None:
+            profiler.mark("explosions")
+
+        # Reload any silos which are due
+        self.scheduler.run(self.tick, reload_phase)
+
+        if profiler is not None:
+            profiler.mark("silos")
+
+        # Remove everything despawned this tick, it can be reused now nothing is looking at it
+        for registry in (self.player_missiles, self.attack_missiles, self.explosions):
+            for entity in registry.flush():
+                entity.release()
+
+                # Room for another attack missile
+                if registry is self.attack_missiles:
+                    self.wakeSpawn()
+
+        if self.telemetry is not None:
+            self.telemetry.record(self)
+
+        # Progress the simulated clock onto the next tick
+        self.tick += 1
+        self.now = self.tick * 1000 // self.tick_rate
+
+
+# Read-only copy of what is needed to draw a missile, drawn exactly like the missile it was taken from
+class MissileSnapshot:
+    __slots__ = ("pos", "prev_pos", "radius", "start_position")
+
+    def __init__(self, missile):
+        self.pos = (missile.pos[0], missile.pos[1])
+        self.prev_pos = (missile.prev_pos[0], missile.prev_pos[1])
+        self.radius = missile.radius
+        self.start_position = (missile.start_position[0], missile.start_position[1])
+
+    position = Missile.position
+    trail_end = Missile.trail_end
+    draw = Missile.draw
+
+
+# Read-only copy of what is needed to draw an explosion
+class ExplosionSnapshot:
+    __slots__ = ("pos", "radius", "prev_radius")
+
+    def __init__(self, explosion):
+        self.pos = (explosion.pos[0], explosion.pos[1])
+        self.radius = explosion.radius
+        self.prev_radius = explosion.prev_radius
+
+    radius_at = Explosion.radius_at
+    draw = Explosion.draw
+
+
+# Read-only copy of what is needed to draw a city
+# The rects and colours of the buildings never change, so they are shared with the city
+class CitySnapshot:
+    __slots__ = ("buildings", "building_colours", "destroyed_rects", "building_count", "building_destroyed",
+                 "version", "repairing", "repair_rect")
+
+    def __init__(self, city):
+        self.buildings = city.buildings
+        self.building_colours = city.building_colours
+        self.destroyed_rects = city.destroyed_rects
+        self.building_count = city.building_count
+        self.building_destroyed = bytes(city.building_destroyed)
+        self.version = city.version
+        self.repairing = city.repairing
+        self.repair_rect = pygame.Rect(city.repair_rect)
+
+    draw_buildings = City.draw_buildings
+    draw_repair = City.draw_repair
+    draw = City.draw
+
+
+# Read-only copy of what is needed to draw a silo
+# Everything but the ammunition never changes, so it is shared with the silo
+class SiloSnapshot:
+    __slots__ = ("x", "y", "height", "ammo_radius", "max_missiles", "mound_vertices", "silo_rect", "missiles")
+
+    def __init__(self, silo):
+        self.x = silo.x
+        self.y = silo.y
+        self.height = silo.height
+        self.ammo_radius = silo.ammo_radius
+        self.max_missiles = silo.max_missiles
+        self.mound_vertices = silo.mound_vertices
+        self.silo_rect = silo.silo_rect
+        self.missiles = silo.missiles
+
+    ammo_position = Silo.ammo_position
+    ammo_area = Silo.ammo_area
+    draw_mound = Silo.draw_mound
+    draw_ammo = Silo.draw_ammo
+    draw = Silo.draw
+
+
+# Everything needed to draw the engine after a tick, which can be drawn while the engine moves on
+# It has the same cities, silos, missiles and explosions as the engine, so it is drawn the same way
+class Snapshot:
+    __slots__ = ("source", "tick", "time", "cities", "silos", "player_missiles", "attack_missiles", "explosions")
+
+    # Take a snapshot of engine, reusing the cities of the previous snapshot which haven't changed since
+    def __init__(self, engine, previous=None):
+        self.source = id(engine)
+        self.tick = engine.tick
+        self.time = time.perf_counter()
+
+        cities = []
+        for index, city in enumerate(engine.cities):
+            old = previous.cities[index] if previous is not None else None
+            if old is not None and old.version == city.version and not old.repairing and not city.repairing:
+                cities.append(old)
+            else:
+                cities.append(CitySnapshot(city))
+        self.cities = tuple(cities)
+
+        self.silos = tuple(SiloSnapshot(silo) for silo in engine.silos)
+        self.player_missiles = tuple(MissileSnapshot(missile) for missile in engine.player_missiles)
+        self.attack_missiles = tuple(MissileSnapshot(missile) for missile in engine.attack_missiles)
+        self.explosions = tuple(ExplosionSnapshot(explosion) for explosion in engine.explosions)
+
+
+# Holds the latest snapshot and the one before it
+# The simulation publishes into the back slot and swaps, so the front is always a finished snapshot
+class SnapshotBuffer:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = [None, None]
+        self.front = 0
+
+    # Make snapshot the one which is drawn
+    def publish(self, snapshot):
+        with self.lock:
+            self.slots[1 - self.front] = snapshot
+            self.front = 1 - self.front
+
+    # Get the most recently published snapshot
+    def latest(self):
+        with self.lock:
+            return self.slots[self.front]
+
+
+# Runs an engine on its own thread at its tick rate, publishing a snapshot after every tick
+# Clicks are queued from the main thread and simulated on the very next tick, without waiting on a frame to be drawn
+class SimulationThread(threading.Thread):
+
+    # Initialize the thread, every tick's clicks are recorded to recorder if it is given
+    # If defender is given, it is called with the engine before every tick, returning more clicks for the tick
+    def __init__(self, engine, recorder=None, defender=None):
+        super().__init__(name="simulation", daemon=True)
+        self.engine = engine
+        self.recorder = recorder
+        self.defender = defender
+        self.inputs = queue.Queue()
+        self.snapshots = SnapshotBuffer()
+        self.snapshots.publish(Snapshot(engine))
+        self.running = True
+
+        # Exception which stopped the simulation, so the main thread can raise it
+        self.error = None
+
+    # Queue a click for the next tick
+    def click(self, button, pos):
+        self.inputs.put((button, pos))
+
+    # Stop simulating and wait for the current tick to finish
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        engine = self.engine
+        tick_length = 1 / engine.tick_rate
+        next_tick = time.perf_counter()
+        snapshot = self.snapshots.latest()
+
+        try:
+            while self.running:
+                # Wait for the next tick, giving up on catching up once too far behind
+                now = time.perf_counter()
+                if next_tick > now:
+                    time.sleep(next_tick - now)
+                elif now - next_tick > tick_length * max_catch_up:
+                    next_tick = now
+                next_tick += tick_length
+
+                inputs = []
+                while True:
+                    try:
+                        inputs.append(self.inputs.get_nowait())
+                    except queue.Empty:
+                        break
+                if self.defender is not None:
+                    inputs.extend(self.defender(engine))
+
+                if self.recorder is not None:
+                    self.recorder.record(engine.tick, inputs)
+                engine.step(inputs)
+
+                snapshot = Snapshot(engine, snapshot)
+                self.snapshots.publish(snapshot)
+        except Exception as error:
+            self.error = error
+
+
+# Recordings start with a header holding the seed, tick rate, size of the game area and amount of cities and silos,
+# followed by a record for every click, and end with a record using button 0 on the last tick
+recording_magic = b"MCRC"
+recording_header = struct.Struct("<4sBqHHHHH")
+recording_click = struct.Struct("<IBhh")
+recording_version = 5
+
+
+# Writes the clicks of a game to a recording, so it can be replayed exactly
+class Recorder:
+
+    # Open the recording at path, for a game played with seed at rate ticks per second,
+    # with the current size of the game area and the given amount of cities and silos
+    def __init__(self, path, seed, rate, cities=3, silos=2):
+        self.file = open(path, "wb")
+        self.file.write(recording_header.pack(recording_magic, recording_version, seed, rate, width, height,
+                                              cities, silos))
+
+    # Record the clicks given to the engine on tick
+    def record(self, tick, inputs):
+        for button, pos in inputs:
+            self.file.write(recording_click.pack(tick, button, pos[0], pos[1]))
+
+    # Mark the tick the game finished on and close the recording
+    def close(self, tick):
+        self.file.write(recording_click.pack(tick, 0, 0, 0))
+        self.file.close()
+
+
+# Read a recording, returning its seed, tick rate, length in ticks, a dictionary of the clicks made on each tick,
+# and the (width, height, cities, silos) it was played with
+def load_recording(path):
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, seed, rate, *arena = recording_header.unpack_from(data)
+    if magic != recording_magic or version != recording_version:
+        raise ValueError("%s is not a version %d recording" % (path, recording_version))
+
+    length = 0
+    clicks = {}
+    for tick, button, x, y in recording_click.iter_unpack(data[recording_header.size:]):
+        length = max(length, tick)
+        if button:
+            clicks.setdefault(tick, []).append((button, (x, y)))
+    return seed, rate, length, clicks, tuple(arena)
+
+
+# Replay a recording as fast as possible, drawing every render_every ticks if it isn't 0
+# If a FrameProfiler is given, every tick is timed with it, if a FrameCapture is given, every drawn frame is captured,
+# and if a Telemetry is given, the state after every tick is recorded to it
+# Returns the engine in the state the recording finished in
+def replay(path, render_every=0, backend="python", profiler=None, capture=None, telemetry=None):
+    seed, rate, length, clicks, (arena_width, arena_height, cities, silos) = load_recording(path)
+    resize(arena_width, arena_height)
+    engine = Engine(rate, backend=backend, seed=seed, cities=cities, silos=silos)
+    engine.profiler = profiler
+    engine.telemetry = telemetry
+
+    renderer = None
+    if render_every:
+        renderer = Renderer(open_window())
+
+    start = time.perf_counter()
+    while engine.tick < length:
+        if profiler is not None:
+            profiler.begin_frame()
+
+        engine.step(clicks.get(engine.tick, ()))
+
+        if renderer is not None and engine.tick % render_every == 0:
+            pygame.event.pump()
+            rects = renderer.draw(engine)
+            if profiler is not None:
+                profiler.mark("draw")
+            if capture is not None:
+                capture.capture(screen)
+                if profiler is not None:
+                    profiler.mark("capture")
+            pygame.display.update(rects)
+            if profiler is not None:
+                profiler.mark("display")
+        elif profiler is not None:
+            # Frames which weren't drawn still get every column, so the csv file lines up
+            profiler.mark("draw")
+            if capture is not None:
+                profiler.mark("capture")
+            profiler.mark("display")
+
+        if profiler is not None:
+            profiler.end_frame()
+
+    elapsed = time.perf_counter() - start
+    print("Replayed %d ticks in %.3f seconds (%.0f ticks per second)" %
+          (engine.tick, elapsed, engine.tick / elapsed if elapsed else math.inf))
+    return engine
+
+
+# Draw the current state of the engine onto surface
+# alpha is how far between the previous tick and the current one to draw missiles and explosions
+def draw(engine, surface, alpha=1):
+    # Render sky
+    surface.fill((128, 127, 255))
+
+    # Draw all cities, missiles and explosions
+    for city in engine.cities:
+        city.draw(surface)
+
+    for missile in engine.player_missiles:
+        missile.draw(surface, alpha)
+
+    for missile in engine.attack_missiles:
+        missile.draw(surface, alpha)
+
+    for explosion in engine.explosions:
+        explosion.draw(surface, alpha)
+
+    # Draw the ground
+    pygame.draw.rect(surface, (0, 255, 0), ground)
+
+    # Draw all silos
+    for silo in engine.silos:
+        silo.draw(surface)
+
+
+# Draws the engine onto a surface, only redrawing the parts which changed since the last frame
+# The sky and buildings are cached in a background layer, the ground and silos in a foreground layer,
+# and both layers are only redrawn when a city changes
+class Renderer:
+
+    # Colour used for the see-through parts of the foreground layer
+    transparent = (255, 0, 255)
+
+    # Length of trails in pixels, and how many frames repair bars and ammunition are drawn every,
+    # once the detail is lowered that far
+    short_trail = 48
+    lazy_hud_every = 10
+
+    # Amount of areas, and fraction of the surface they cover, past which the whole surface
+    # is erased and put back in single blits instead of area by area
+    max_dirty_rects = 256
+    max_dirty_fraction = 0.5
+
+    # Initialize the renderer to draw onto surface
+    def __init__(self, surface):
+        self.surface = surface
+        self.background = pygame.Surface(surface.get_size())
+        self.foreground = pygame.Surface(surface.get_size())
+        self.foreground.set_colorkey(self.transparent)
+
+        # What the layers were drawn from, the areas drawn over last frame and the ammo each silo showed
+        # Snapshots are drawn as the engine they were taken from, and silos are counted by their position
+        self.layers_key = None
+        self.dirty = []
+        self.ammo = {}
+
+        # FrameGovernor picking the detail level, or None to always draw at full detail
+        self.governor = None
+        self.frame = 0
+
+    # Redraw the whole surface next frame
+    def invalidate(self):
+        self.layers_key = None
+
+    # Keep track of an area drawn over after draw, so it is erased next frame
+    def overlay(self, rect):
+        if rect is not None:
+            self.dirty.append(rect)
+        return rect
+
+    # Get the areas a missile was drawn over
+    # Long trails are split into short pieces, so a diagonal trail doesn't dirty its whole bounding box,
+    # up to max_pieces of them, so a long trail doesn't add dozens of areas
+    def missile_areas(self, missile, segment=32, alpha=1, trail_length=None, max_pieces=8):
+        x, y = missile.position(alpha)
+        radius = missile.radius
+        areas = [pygame.Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)]
+
+        end_x, end_y = missile.trail_end((x, y), trail_length)
+        pieces = constrain(int(max(abs(end_x - x), abs(end_y - y)) // segment), 1, max_pieces)
+        for piece in range(pieces):
+            x0 = x + (end_x - x) * piece / pieces
+            y0 = y + (end_y - y) * piece / pieces
+            x1 = x + (end_x - x) * (piece + 1) / pieces
+            y1 = y + (end_y - y) * (piece + 1) / pieces
+
+            # Pad by two pixels, so rounding in the drawn line always stays inside
+            left, top = math.floor(min(x0, x1)) - 2, math.floor(min(y0, y1)) - 2
+            areas.append(pygame.Rect(left, top, math.ceil(max(x0, x1)) + 3 - left, math.ceil(max(y0, y1)) + 3 - top))
+        return areas
+
+    # Draw explosions, merging the ones piled up in the same place into a single draw of the biggest,
+    # returning the areas drawn over
+    def draw_merged_explosions(self, explosions, alpha=1, cell=32):
+        biggest = {}
+        for explosion in explosions:
+            key = (int(explosion.pos[0]) // cell, int(explosion.pos[1]) // cell)
+            radius = explosion.radius_at(alpha)
+            if key not in biggest or radius > biggest[key][1]:
+                biggest[key] = (explosion, radius)
+        return [explosion.draw(self.surface, alpha) for explosion, _ in biggest.values()]
+
+    # Redraw the cached background and foreground layers
+    def draw_layers(self, engine):
+        self.background.fill((128, 127, 255))
+        for city in engine.cities:
+            city.draw_buildings(self.background)
+
+        self.foreground.fill(self.transparent)
+        pygame.draw.rect(self.foreground, (0, 255, 0), ground)
+        for silo in engine.silos:
+            silo.draw_mound(self.foreground)
+
+    # Draw a frame, returning the list of areas which need to be pushed to the display
+    # alpha is how far between the previous tick and the current one to draw missiles and explosions
+    def draw(self, engine, alpha=1):
+        detail = self.governor.level if self.governor is not None else detail_full
+        trail_length = self.short_trail if detail >= detail_short_trails else None
+        lazy_hud = detail >= detail_lazy_hud
+        hud_due = self.frame % self.lazy_hud_every == 0
+        self.frame += 1
+
+        source = engine.source if isinstance(engine, Snapshot) else id(engine)
+        key = (source, tuple(city.version for city in engine.cities))
+        full = key != self.layers_key or self.dirty is None
+        if key != self.layers_key:
+            self.layers_key = key
+            self.draw_layers(engine)
+            self.ammo.clear()
+
+        # Ammunition which changed has to be cleared as well
+        restore = [] if full else list(self.dirty)
+        ammo_changed = False
+        for index, silo in enumerate(engine.silos):
+            if self.ammo.get(index) != silo.missiles:
+                self.ammo[index] = silo.missiles
+                restore.append(silo.ammo_area())
+                ammo_changed = True
+
+        # Erase everything which was drawn last frame, all at once if that is most of the surface
+        surface_rect = self.surface.get_rect()
+        limit = surface_rect.w * surface_rect.h * self.max_dirty_fraction
+        if full or len(restore) > self.max_dirty_rects or sum(rect.w * rect.h for rect in restore) > limit:
+            full = True
+            restore = [surface_rect]
+        for rect in restore:
+            self.surface.blit(self.background, rect, rect)
+
+        # Draw repair progress, missiles and explosions
+        # Lazily drawn repair bars aren't erased next frame, they only grow until the city is drawn again,
+        # or the whole surface is erased
+        drawn = []
+        hud = []
+        for city in engine.cities:
+            if not lazy_hud:
+                drawn.append(city.draw_repair(self.surface))
+            elif hud_due or full:
+                hud.append(city.draw_repair(self.surface))
+
+        # Once there are too many areas to put back one by one, the rest aren't worked out
+        overflow = False
+        for missiles in (engine.player_missiles, engine.attack_missiles):
+            for missile in missiles:
+                missile.draw(self.surface, alpha, trail_length)
+                if len(drawn) > self.max_dirty_rects:
+                    overflow = True
+                else:
+                    drawn.extend(self.missile_areas(missile, alpha=alpha, trail_length=trail_length))
+
+        if detail >= detail_merged_explosions:
+            drawn.extend(self.draw_merged_explosions(engine.explosions, alpha))
+        else:
+            for explosion in engine.explosions:
+                drawn.append(explosion.draw(self.surface, alpha))
+
+        drawn = [rect for rect in drawn if rect is not None]
+        hud = [rect for rect in hud if rect is not None]
+
+        # Too many areas are erased next frame in one go, the same as a full redraw
+        overflow = overflow or len(drawn) > self.max_dirty_rects or sum(rect.w * rect.h for rect in drawn) > limit
+        self.dirty = None if overflow else drawn
+
+        # Put the ground and silos back on top of everything which changed
+        changed = [surface_rect] if full or overflow else restore + drawn
+        for rect in changed:
+            self.surface.blit(self.foreground, rect, rect)
+
+        # Ammunition sits on top of the silos, so it is redrawn every frame,
+        # or lazily only when it changed, something was drawn over it, or it is due
+        for silo in engine.silos:
+            if not lazy_hud or ammo_changed or hud_due or silo.ammo_area().collidelist(changed) != -1:
+                silo.draw_ammo(self.surface)
+
+        # The whole surface was put back, so a single update covers everything
+        if full or overflow:
+            return changed
+        return changed + hud
+
+
+# Initialize pygame and open the game window, returning the screen
+def open_window():
+    global screen, clock
+
+    pygame.init()
+    screen = pygame.display.set_mode([width, height])
+    pygame.display.set_caption("Missile Command")
+    clock = pygame.time.Clock()
+
+    # Render every explosion size up front, so chain reactions never stall on a new sprite
+    sprites.preload((255, 255, 255), range(1, 81))
+    return screen
+
+
+# Draw snapshots of an engine simulated on its own thread, as often as frame_rate allows
+# Clicks are handed to the simulation as soon as they are read
+def run_threaded(engine, renderer, recorder=None, profiler=None, frame_rate=tick_rate, capture=None, defender=None):
+    simulation = SimulationThread(engine, recorder, defender)
+    simulation.start()
+    tick_length = 1 / engine.tick_rate
+
+    try:
+        while True:
+            if profiler is not None:
+                profiler.begin_frame()
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    sys.exit(0)
+
+                if event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate()
+
+                # The simulation runs on another thread, so the profiler only times drawing
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    if profiler is None:
+                        profiler = FrameProfiler()
+                        profiler.begin_frame()
+                    profiler.toggle()
+
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    simulation.click(event.button, event.pos)
+
+            if profiler is not None:
+                profiler.mark("events")
+
+            if simulation.error is not None:
+                raise simulation.error
+
+            # Draw the latest snapshot partway from its previous tick, depending on how long ago it was taken
+            snapshot = simulation.snapshots.latest()
+            alpha = min(1, (time.perf_counter() - snapshot.time) / tick_length)
+            rects = renderer.draw(snapshot, alpha)
+            if profiler is not None:
+                profiler.mark("draw")
+
+            # Frames are captured before the profiler overlay is drawn over them
+            if capture is not None:
+                capture.capture(screen)
+                if profiler is not None:
+                    profiler.mark("capture")
+
+            if profiler is not None:
+                hud = renderer.overlay(profiler.draw(screen))
+                if hud is not None:
+                    rects.append(hud)
+                profiler.mark("draw")
+
+            pygame.display.update(rects)
+
+            if profiler is not None:
+                profiler.mark("display")
+                profiler.end_frame()
+
+            clock.tick(frame_rate)
+            if renderer.governor is not None:
+                renderer.governor.add_frame(clock.get_rawtime())
+    finally:
+        simulation.stop()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Missile Command")
+    parser.add_argument("--seed", type=int, help="seed for every random choice in the game")
+    parser.add_argument("--backend", choices=["python", "numpy"], default="python")
+    parser.add_argument("--record", metavar="PATH", help="record every click to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="replay the recording at PATH as fast as possible")
+    parser.add_argument("--render-every", type=int, default=0, metavar="N",
+                        help="while replaying, draw every N ticks instead of never drawing")
+    parser.add_argument("--profile-csv", metavar="PATH",
+                        help="time every phase of every frame, writing the timings to PATH")
+    parser.add_argument("--fixed-step", action="store_true",
+                        help="simulate at a fixed rate however fast frames are drawn, drawing in between ticks")
+    parser.add_argument("--size", type=int, nargs=2, default=[width, height], metavar=("WIDTH", "HEIGHT"),
+                        help="size of the window")
+    parser.add_argument("--cities", type=int, default=3, help="amount of cities")
+    parser.add_argument("--silos", type=int, default=2, help="amount of silos")
+    parser.add_argument("--threaded", action="store_true",
+                        help="simulate on a separate thread at a fixed rate, drawing the latest tick")
+    parser.add_argument("--fps", type=int, default=0,
+                        help="with --fixed-step or --threaded, the most frames drawn each second, "
+                             "defaults to the tick rate")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="record the state of the game after every tick to PATH, starting PATH.1 and so on "
+                             "every million ticks")
+    parser.add_argument("--full-detail", action="store_true",
+                        help="always draw at full detail, instead of drawing less while frames are too slow")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the autopilot defend, firing at every attack missile which threatens a city")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="capture the frames drawn to PATH, a file or with the png format a directory")
+    parser.add_argument("--capture-format", choices=["raw", "png", "delta"], default="delta",
+                        help="raw RGB frames, a PNG image per frame, or compressed differences between frames")
+    parser.add_argument("--capture-every", type=int, default=1, metavar="N", help="capture every N frames")
+    parser.add_argument("--capture-scale", type=int, default=1, metavar="N",
+                        help="shrink captured frames N times in each direction")
+    options = parser.parse_args(arguments)
+
+    profiler = FrameProfiler(csv_path=options.profile_csv) if options.profile_csv else None
+    resize(*options.size)
+
+    # The capture module needs NumPy, so it is only imported when capturing
+    # Replays wait for the writer rather than drop frames, as they aren't played in real time
+    capture = None
+    if options.capture:
+        from missile_command.capture import FrameCapture
+        capture = FrameCapture(options.capture, options.capture_format, options.capture_every,
+                               options.capture_scale, wait=bool(options.replay))
+
+    # The autopilot needs NumPy as well, so it is also only imported when used
+    defender = None
+    if options.autopilot:
+        from missile_command import autopilot
+        defender = autopilot.plan
+
+    telemetry = None
+    if options.telemetry:
+        from missile_command.telemetry import Telemetry
+        telemetry = Telemetry(options.telemetry)
+
+    if options.replay:
+        try:
+            replay(options.replay, options.render_every, options.backend, profiler, capture, telemetry)
+        finally:
+            if telemetry is not None:
+                telemetry.close()
+            if capture is not None:
+                capture.close()
+            if profiler is not None:
+                profiler.close()
+        return
+
+    # A seed is always picked, so the game can be recorded
+    seed = options.seed if options.seed is not None else random.randrange(1 << 62)
+    engine = Engine(backend=options.backend, seed=seed, cities=options.cities, silos=options.silos)
+    engine.telemetry = telemetry
+    renderer = Renderer(open_window())
+    recorder = None
+    if options.record:
+        recorder = Recorder(options.record, seed, engine.tick_rate, options.cities, options.silos)
+
+    # Frames are drawn in less detail while they take longer than they have, unless asked not to
+    # Without --fixed-step or --threaded, a frame is drawn every tick
+    if not options.full_detail:
+        frame_rate = options.fps or engine.tick_rate if options.fixed_step or options.threaded else engine.tick_rate
+        renderer.governor = FrameGovernor(1000 / frame_rate)
+
+    if options.threaded:
+        try:
+            run_threaded(engine, renderer, recorder, profiler, options.fps or engine.tick_rate, capture, defender)
+        finally:
+            if telemetry is not None:
+                telemetry.close()
+            if capture is not None:
+                capture.close()
+            if recorder is not None:
+                recorder.close(engine.tick)
+            if profiler is not None:
+                profiler.close()
+        return
+
+    engine.profiler = profiler
+
+    # Real time not yet simulated, in seconds, and how long each tick lasts
+    # The first frame always simulates a tick, so every phase is timed from the start
+    tick_length = 1 / engine.tick_rate
+    accumulator = tick_length
+    last_frame = time.perf_counter()
+    frame_rate = options.fps or engine.tick_rate
+
+    # Clicks waiting for the next tick
+    inputs = []
+
+    # Game loop
+    try:
+        while True:
+            if profiler is not None:
+                profiler.begin_frame()
+
+            # Checks if user has interacted with pygame window
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    sys.exit(0)
+
+                # Checks if the window needs to be drawn again, after being covered up or restored
+                if event.type == pygame.VIDEOEXPOSE:
+                    renderer.invalidate()
+
+                # Checks if the profiler overlay has been toggled, starting the profiler the first time
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    if profiler is None:
+                        profiler = FrameProfiler()
+                        profiler.begin_frame()
+                        engine.profiler = profiler
+                    profiler.toggle()
+
+                # Checks if user has clicked using the mouse
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    inputs.append((event.button, event.pos))
+
+            if profiler is not None:
+                profiler.mark("events")
+
+            # Either simulate a tick every frame,
+            # or every tick which fits into the time since the last frame, drawing partway to the next one
+            alpha = 1
+            if not options.fixed_step:
+                steps = 1
+            else:
+                now = time.perf_counter()
+                accumulator = min(accumulator + now - last_frame, tick_length * max_catch_up)
+                last_frame = now
+
+                steps = int(accumulator // tick_length)
+                accumulator -= steps * tick_length
+                alpha = accumulator / tick_length
+
+            for _ in range(steps):
+                if defender is not None:
+                    inputs.extend(defender(engine))
+                if recorder is not None:
+                    recorder.record(engine.tick, inputs)
+                engine.step(inputs)
+                inputs = []
+
+            # Progress onto next frame, only pushing the parts of the screen which changed
+            rects = renderer.draw(engine, alpha)
+            if profiler is not None:
+                profiler.mark("draw")
+
+            # Frames are captured before the profiler overlay is drawn over them
+            if capture is not None:
+                capture.capture(screen)
+                if profiler is not None:
+                    profiler.mark("capture")
+
+            if profiler is not None:
+                hud = renderer.overlay(profiler.draw(screen))
+                if hud is not None:
+                    rects.append(hud)
+                profiler.mark("draw")
+
+            pygame.display.update(rects)
+
+            if profiler is not None:
+                profiler.mark("display")
+                profiler.end_frame()
+
+            clock.tick(frame_rate if options.fixed_step else engine.tick_rate)
+            if renderer.governor is not None:
+                renderer.governor.add_frame(clock.get_rawtime())
+    finally:
+        if telemetry is not None:
+            telemetry.close()
+        if capture is not None:
+            capture.close()
+        if recorder is not None:
+            recorder.close(engine.tick)
+        if profiler is not None:
+            profiler.close()
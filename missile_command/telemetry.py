@@ -0,0 +1,154 @@
+# Records the state of a game after every tick, for analysing long sessions
+# Every tick appends a fixed size record to a buffer of chunk records, which is written to disk in one go once full,
+# so a session of any length uses the same memory and only writes every few seconds.
+# Files are rotated once they hold rotate records, keeping the newest keep of them if keep is given,
+# so a session of any length also fits in a bounded amount of disk. For example:
+#   python -m missile_command --telemetry session.tlm
+#   seed, rate, records = load_telemetry("session.tlm")
+#   records["attack_missiles"], records["ammo"][:, 0], records["destroyed_buildings"].sum(axis=1)
+
+# Imports
+import os
+import struct
+
+from missile_command import game
+
+# Telemetry files start with a header holding the seed, tick rate and amount of silos and cities,
+# which fixes the layout of every record after it
+telemetry_magic = b"MCTL"
+telemetry_header = struct.Struct("<4sBqHBB")
+telemetry_version = 1
+
+
+# Get the layout of a record for silos and cities: the tick, the live attack missiles, player missiles
+# and explosions, the collisions resolved during the tick, then the ammunition in each silo
+# and the destroyed buildings in each city
+def record_layout(silos, cities):
+    return struct.Struct("<IHHHH%dB%dB" % (silos, cities))
+
+
+# Get the path of the index'th file of telemetry written to path
+def segment_path(path, index):
+    return path if index == 0 else "%s.%d" % (path, index)
+
+
+# Get the index and path of every file of telemetry written to path which is still there, oldest first
+def segment_paths(path):
+    directory, name = os.path.split(path)
+    segments = []
+    for entry in os.listdir(directory or "."):
+        suffix = entry[len(name) + 1:]
+        if entry == name:
+            segments.append((0, path))
+        elif entry.startswith(name + ".") and suffix.isdigit():
+            segments.append((int(suffix), os.path.join(directory, entry)))
+    return sorted(segments)
+
+
+# Writes a record of an engine's state after every tick it is given, see Engine.telemetry
+class Telemetry:
+
+    # Write to path, buffering chunk records and starting a new file every rotate records
+    # If keep is given, only the newest keep files are kept
+    def __init__(self, path, chunk=1024, rotate=1 << 20, keep=None):
+        self.path = path
+        self.chunk = chunk
+        self.rotate = rotate
+        self.keep = keep
+
+        # The file and record layout are made by the first record, once the engine is known
+        self.file = None
+        self.header = None
+        self.layout = None
+        self.buffer = None
+        self.buffered = 0
+        self.segment = -1
+        self.segment_records = 0
+
+        # Collisions counted by the engine up to the last record
+        self.intercepted = 0
+
+    # Start the next file, deleting the oldest one if there are more than keep
+    # The first file deletes the files left by any earlier session written to the same path,
+    # so they are never loaded as part of this one
+    def next_segment(self):
+        if self.file is not None:
+            self.file.close()
+
+        self.segment += 1
+        if self.segment == 0:
+            for index, segment in segment_paths(self.path):
+                if index:
+                    os.remove(segment)
+        self.segment_records = 0
+        self.file = open(segment_path(self.path, self.segment), "wb")
+        self.file.write(self.header)
+        if self.keep is not None and self.segment >= self.keep:
+            os.remove(segment_path(self.path, self.segment - self.keep))
+
+    # Write the buffered records to the current file
+    def flush(self):
+        if self.buffered:
+            self.file.write(memoryview(self.buffer)[:self.buffered * self.layout.size])
+            self.buffered = 0
+
+    # Record the engine's state after the tick it just simulated
+    def record(self, engine):
+        if self.layout is None:
+            self.layout = record_layout(len(engine.silos), len(engine.cities))
+            self.buffer = bytearray(self.chunk * self.layout.size)
+            self.header = telemetry_header.pack(telemetry_magic, telemetry_version,
+                                                engine.seed if engine.seed is not None else -1, engine.tick_rate,
+                                                len(engine.silos), len(engine.cities))
+            self.next_segment()
+
+        if self.segment_records == self.rotate:
+            self.flush()
+            self.next_segment()
+
+        self.layout.pack_into(self.buffer, self.buffered * self.layout.size, engine.tick,
+                              len(engine.attack_missiles), len(engine.player_missiles), len(engine.explosions),
+                              engine.missiles_intercepted - self.intercepted,
+                              *[silo.missiles for silo in engine.silos],
+                              *[city.destroyed_buildings for city in engine.cities])
+        self.intercepted = engine.missiles_intercepted
+        self.buffered += 1
+        self.segment_records += 1
+        if self.buffered == self.chunk:
+            self.flush()
+
+    # Write any buffered records and close the file
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+# Read every file of telemetry written to path which is still there, oldest first,
+# returning the seed and tick rate of the game and its records as a NumPy structured array
+# The ammunition and destroyed buildings fields hold a column for each silo and city
+def load_telemetry(path):
+    numpy = game.load_numpy()
+    if numpy is None:
+        raise ImportError("Loading telemetry requires numpy to be installed")
+
+    segments = segment_paths(path)
+    if not segments:
+        raise FileNotFoundError(path)
+
+    seed = rate = dtype = None
+    records = []
+    for _, entry in segments:
+        with open(entry, "rb") as file:
+            magic, version, seed, rate, silos, cities = telemetry_header.unpack(file.read(telemetry_header.size))
+            if magic != telemetry_magic or version != telemetry_version:
+                raise ValueError("%s is not version %d telemetry" % (entry, telemetry_version))
+
+            # Same layout as record_layout, packed without any padding
+            dtype = numpy.dtype([("tick", "<u4"), ("attack_missiles", "<u2"), ("player_missiles", "<u2"),
+                                 ("explosions", "<u2"), ("collisions", "<u2"),
+                                 ("ammo", "u1", (silos,)), ("destroyed_buildings", "u1", (cities,))])
+            records.append(numpy.fromfile(file, dtype=dtype))
+
+    return seed, rate, numpy.concatenate(records)
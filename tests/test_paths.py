@@ -0,0 +1,97 @@
+# Checks every way of walking a Bresenham path lands on the same points and finishes on the same call,
+# for random lines between whole and fractional points
+
+# Imports
+import random
+
+import pytest
+
+from missile_command import game
+
+
+# Get random lines, including ones of zero length, between whole points and points between pixels
+def random_lines(count=500, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for index in range(count):
+        p0 = [rng.uniform(0, 320), rng.uniform(0, 240)]
+        p1 = [p0[0] + rng.uniform(-60, 60), p0[1] + rng.uniform(-60, 60)]
+        if index % 3 == 0:
+            p0, p1 = [round(value) for value in p0], [round(value) for value in p1]
+        if index % 25 == 0:
+            p1 = list(p0)
+        lines.append((p0, p1))
+    return lines
+
+
+# Walk a line one point per call, returning the state after every call up to and including the one that finishes it
+def walk(p0, p1):
+    path = game.Bresenham(p0, p1)
+    states = []
+    while not path.finished():
+        path.get_next()
+        states.append((path.x0, path.y0, path.err, path.finished()))
+    return states
+
+
+@pytest.mark.parametrize("p0, p1", random_lines())
+def test_point_and_seek_match_walk(p0, p1):
+    states = walk(p0, p1)
+    path = game.Bresenham(p0, p1)
+
+    # The finishing call is the one after the end point, at length + 2 calls
+    assert len(states) == path.length + 2
+    for step, (x, y, err, end) in enumerate(states):
+        assert path.point(step) == [x, y]
+
+        seeking = game.Bresenham(p0, p1)
+        assert seeking.seek(step) == [x, y]
+        assert (seeking.err, seeking.finished()) == (err, end)
+
+
+@pytest.mark.parametrize("speed", [1, 2, 3, 5])
+def test_steps_match_walk(speed):
+    for p0, p1 in random_lines():
+        states = walk(p0, p1)
+        path = game.Bresenham(p0, p1)
+        calls = 0
+        while not path.finished():
+            path.get_next(speed)
+            calls += speed
+            x, y, err, end = states[min(calls, len(states)) - 1]
+            assert path.get_current_pos() == [x, y]
+            assert path.finished() == (calls >= len(states))
+
+
+@pytest.mark.parametrize("speed", [1, 2, 3, 5])
+def test_missile_store_matches_walk(speed):
+    if game.load_numpy() is None:
+        pytest.skip("The numpy missile backend requires numpy")
+
+    lines = random_lines()
+    store = game.MissileStore()
+    paths = [store.path(p0, p1, speed) for p0, p1 in lines]
+    walkers = [game.Bresenham(p0, p1) for p0, p1 in lines]
+
+    # A store path reports finishing once it had ended before the tick's advance, as Missile.update expects
+    while not all(walker.finished() for walker in walkers):
+        store.advance()
+        for path, walker in zip(paths, walkers):
+            assert path.finished() == walker.finished()
+            if not walker.finished():
+                walker.get_next(speed)
+                assert path.get_current_pos() == walker.get_current_pos()
+
+
+def test_path_offsets_match_point():
+    numpy = game.load_numpy()
+    if numpy is None:
+        pytest.skip("path_offsets requires numpy")
+
+    paths = [game.Bresenham(p0, p1) for p0, p1 in random_lines()]
+    dx = numpy.array([path.dx for path in paths], dtype=numpy.float64)
+    dy = numpy.array([path.dy for path in paths], dtype=numpy.float64)
+    for step in range(0, 100, 3):
+        moved_x, moved_y = game.path_offsets(dx, dy, step)
+        for path, x, y in zip(paths, moved_x.tolist(), moved_y.tolist()):
+            assert path.point(step) == [path.p0[0] + path.sx * x, path.p0[1] + path.sy * y]
@@ -0,0 +1,59 @@
+# Checks telemetry reads back the ticks that were recorded, across rotated files and sessions written to one path
+
+# Imports
+import os
+
+import pytest
+
+from missile_command import game
+from missile_command.telemetry import Telemetry, load_telemetry
+
+if game.load_numpy() is None:
+    pytest.skip("Loading telemetry requires numpy", allow_module_level=True)
+
+
+# Record ticks ticks of a game to path, returning the engine
+def record(path, ticks, cities=3, silos=2, **options):
+    engine = game.Engine(seed=1, cities=cities, silos=silos)
+    engine.telemetry = Telemetry(str(path), **options)
+    for _ in range(ticks):
+        engine.step()
+    engine.telemetry.close()
+    return engine
+
+
+def test_records_every_tick(tmp_path):
+    engine = record(tmp_path / "session.tlm", 500, chunk=64)
+    seed, rate, records = load_telemetry(str(tmp_path / "session.tlm"))
+
+    assert (seed, rate) == (1, engine.tick_rate)
+    assert records["tick"].tolist() == list(range(500))
+    assert records["ammo"].shape == (500, 2)
+    assert records["destroyed_buildings"].shape == (500, 3)
+    assert records["collisions"].sum() == engine.missiles_intercepted
+
+
+def test_rotates_files(tmp_path):
+    record(tmp_path / "session.tlm", 3000, chunk=64, rotate=1000)
+
+    assert sorted(os.listdir(tmp_path)) == ["session.tlm", "session.tlm.1", "session.tlm.2"]
+    _, _, records = load_telemetry(str(tmp_path / "session.tlm"))
+    assert records["tick"].tolist() == list(range(3000))
+
+
+def test_keeps_newest_files(tmp_path):
+    record(tmp_path / "session.tlm", 3000, chunk=64, rotate=1000, keep=2)
+
+    assert sorted(os.listdir(tmp_path)) == ["session.tlm.1", "session.tlm.2"]
+    _, _, records = load_telemetry(str(tmp_path / "session.tlm"))
+    assert records["tick"].tolist() == list(range(1000, 3000))
+
+
+def test_rewriting_a_path_drops_the_earlier_session(tmp_path):
+    record(tmp_path / "session.tlm", 3000, chunk=64, rotate=1000)
+    record(tmp_path / "session.tlm", 500, cities=4, silos=3, chunk=64, rotate=1000)
+
+    assert os.listdir(tmp_path) == ["session.tlm"]
+    _, _, records = load_telemetry(str(tmp_path / "session.tlm"))
+    assert records["tick"].tolist() == list(range(500))
+    assert records["ammo"].shape == (500, 3)